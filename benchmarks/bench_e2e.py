@@ -0,0 +1,348 @@
+"""
+End-to-end benchmark: the main() pipeline against a local IMDb stand-in.
+
+For every chart size a stub server (benchmarks.stub_server) is started and
+the pipeline runs in a fresh interpreter, so peak RSS is per scenario.
+Stages:
+
+    chart          chart pages fetched one after another (per-page latency)
+    scrape         IMDBScraper.extract_data drained (per-title latency)
+    persist.<sink> save_stream over the scraped movies (per-movie hand-off)
+    pipeline       scrape fanned out to every sink, as main() does
+
+Each stage reports titles/s, p50/p99 latency, peak RSS so far and bytes
+served. Results are written to benchmarks/results/<commit>.json.
+
+    python -m benchmarks.bench_e2e
+    python -m benchmarks.bench_e2e --titles 250 10000 100000 --latency-ms 80 --throttle-rate 0.02
+    python -m benchmarks.bench_e2e --sinks csv parquet postgres --concurrency 100
+    python -m benchmarks.bench_e2e --detail-source graphql --graphql-null-rate 0.05
+    python -m benchmarks.bench_e2e --compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.stub_server import StubConfig, StubIMDb
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).parent / "results"
+_RESULT_PREFIX = "BENCH_RESULT "
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def stage_result(titles: int, elapsed: float, latencies: List[float], served: Dict) -> Dict:
+    return {
+        "titles": titles,
+        "seconds": round(elapsed, 3),
+        "titles_per_s": round(titles / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "requests": served.get("requests", 0),
+        "bytes": served.get("bytes_sent", 0),
+        "statuses": served.get("statuses", {}),
+    }
+
+
+# ----------------------------------------------------------------------
+# scenario (runs in the child interpreter)
+# ----------------------------------------------------------------------
+def _server_stats(base_url: str) -> Dict:
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.load(response)
+
+
+def _served_since(before: Dict, after: Dict) -> Dict:
+    statuses = {
+        code: count - before["statuses"].get(code, 0)
+        for code, count in after["statuses"].items()
+        if count - before["statuses"].get(code, 0)
+    }
+    return {
+        "requests": after["requests"] - before["requests"],
+        "bytes_sent": after["bytes_sent"] - before["bytes_sent"],
+        "statuses": statuses,
+    }
+
+
+def _make_sink(name: str, output_dir: str):
+    if name == "csv":
+        from persistence.csv_handler import CSVHandler
+        return CSVHandler(output_dir=output_dir)
+    if name == "parquet":
+        from persistence.parquet_handler import ParquetHandler
+        return ParquetHandler(output_dir=str(Path(output_dir) / "parquet"))
+    if name == "postgres":
+        os.environ["POSTGRES_DB"] = os.getenv("POSTGRES_BENCH_DB", "imdb_bench")
+        from persistence.postgres_handler import PostgresHandler
+        return PostgresHandler()
+    raise ValueError(f"Unknown sink: {name}")
+
+
+def run_scenario(config: Dict) -> Dict:
+    from persistence.base_persistence import BasePersistence
+    from persistence.fanout import FanOutDispatcher
+    from scrapers.imdb import IMDBScraper
+    from utils.request_handler import RequestHandler
+
+    class TimedScraper(IMDBScraper):
+        """Stamps every chart edge as it is handed to the detail fetchers."""
+
+        def __init__(self, request_handler):
+            super().__init__(request_handler=request_handler)
+            self.dispatched: Dict[str, float] = {}
+
+        def _iter_chart_edges(self, url, use_proxy, verify_proxy):
+            for edge in super()._iter_chart_edges(url, use_proxy, verify_proxy):
+                self.dispatched[edge["node"]["id"]] = time.perf_counter()
+                yield edge
+
+    class TimedSink(BasePersistence):
+        """Measures how long the wrapped sink holds each movie before asking for the next."""
+
+        def __init__(self, inner: BasePersistence):
+            self.inner = inner
+            self.latencies: List[float] = []
+
+        def save_stream(self, movies, batch_size: int = 1_000) -> int:
+            def timed():
+                for movie in movies:
+                    handed = time.perf_counter()
+                    yield movie
+                    self.latencies.append(time.perf_counter() - handed)
+            return self.inner.save_stream(timed(), batch_size=batch_size)
+
+        def close(self) -> None:
+            self.inner.close()
+
+    base_url, chart_url = config["base_url"], config["chart_url"]
+    batch_size = config["batch_size"]
+    stages: Dict[str, Dict] = {}
+    request_handler = RequestHandler()
+    scraper = TimedScraper(request_handler)
+
+    # chart: pages one after another
+    before, latencies, titles, cursor = _server_stats(base_url), [], 0, None
+    page_size = int(os.getenv("CHART_PAGE_SIZE", "100"))
+    started = time.perf_counter()
+    while True:
+        t = time.perf_counter()
+        chart = scraper._fetch_chart_page(chart_url, page_size, cursor, False, False)
+        latencies.append(time.perf_counter() - t)
+        titles += len(chart["edges"])
+        cursor = chart["pageInfo"].get("endCursor")
+        if not page_size or not chart["pageInfo"].get("hasNextPage"):
+            break
+    stages["chart"] = stage_result(
+        titles, time.perf_counter() - started, latencies, _served_since(before, _server_stats(base_url))
+    )
+
+    # scrape: fetch + parse every title
+    before, latencies, movies = _server_stats(base_url), [], []
+    started = time.perf_counter()
+    for movie in scraper.extract_data(chart_url):
+        latencies.append(time.perf_counter() - scraper.dispatched.get(movie.movie_id, started))
+        movies.append(movie)
+    stages["scrape"] = stage_result(
+        len(movies), time.perf_counter() - started, latencies, _served_since(before, _server_stats(base_url))
+    )
+
+    # persist: each sink on its own, fed from memory
+    for name in config["sinks"]:
+        sink = TimedSink(_make_sink(name, config["output_dir"]))
+        try:
+            started = time.perf_counter()
+            written = sink.save_stream(iter(movies), batch_size=batch_size)
+            stages[f"persist.{name}"] = stage_result(written, time.perf_counter() - started, sink.latencies, {})
+        finally:
+            sink.close()
+    movie_count = len(movies)
+    del movies
+
+    # pipeline: scrape fanned out to every sink, as in main()
+    sinks = {name: TimedSink(_make_sink(name, config["output_dir"])) for name in config["sinks"]}
+    before, latencies = _server_stats(base_url), []
+    scraper.dispatched.clear()
+
+    def stream():
+        for movie in scraper.extract_data(chart_url):
+            latencies.append(time.perf_counter() - scraper.dispatched.get(movie.movie_id, started))
+            yield movie
+
+    try:
+        started = time.perf_counter()
+        results = FanOutDispatcher(sinks).run(stream(), batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+    finally:
+        for sink in sinks.values():
+            sink.close()
+        request_handler.close()
+    stages["pipeline"] = stage_result(
+        len(latencies), elapsed, latencies, _served_since(before, _server_stats(base_url))
+    )
+    stages["pipeline"]["sinks"] = {
+        name: {"written": r.written, "error": repr(r.error) if r.error else None} for name, r in results.items()
+    }
+
+    return {"titles": config["titles"], "scraped": movie_count, "stages": stages}
+
+
+# ----------------------------------------------------------------------
+# driver
+# ----------------------------------------------------------------------
+def _git_commit() -> Dict:
+    def git(*args) -> str:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def _scenario_env(args, stub: StubIMDb) -> Dict:
+    env = dict(os.environ)
+    env.update({
+        "IMDB_BASE_URL": stub.base_url,
+        "IMDB_URL": stub.chart_url,
+        "MAX_CONCURRENT_REQUESTS": str(args.concurrency),
+        "FETCH_ENGINE": args.engine,
+        "PARSE_WORKERS": args.parse_workers,
+        "DETAIL_SOURCE": args.detail_source,
+        "GRAPHQL_URL": f"{stub.base_url}/graphql",
+        "RATE_LIMIT_HOST_RPS": str(args.host_rps),
+        "HTTP_CACHE_MODE": "off",
+        "SCRAPE_MODE": "full",
+        "PROXY_ENABLED": "false",
+        "LOG_LEVEL": env.get("LOG_LEVEL", "WARNING"),
+    })
+    return env
+
+
+def run_all(args) -> Dict:
+    report = {
+        **_git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("compare", "scenario", "output")},
+        "scenarios": [],
+    }
+    for titles in args.titles:
+        stub = StubIMDb(StubConfig(
+            titles=titles, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate, throttle_rate=args.throttle_rate, page_kb=args.page_kb,
+            graphql_null_rate=args.graphql_null_rate,
+        ))
+        stub.start()
+        output_dir = tempfile.mkdtemp(prefix="imdb_bench_")
+        scenario = {
+            "titles": titles, "base_url": stub.base_url, "chart_url": stub.chart_url,
+            "sinks": args.sinks, "batch_size": args.batch_size, "output_dir": output_dir,
+        }
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_e2e", "--scenario", json.dumps(scenario)],
+                cwd=ROOT, env=_scenario_env(args, stub), capture_output=True, text=True,
+            )
+        finally:
+            stub.stop()
+            shutil.rmtree(output_dir, ignore_errors=True)
+        if proc.returncode != 0:
+            sys.stderr.write(proc.stderr)
+            raise SystemExit(f"Scenario with {titles} titles failed")
+
+        line = next(l for l in reversed(proc.stdout.splitlines()) if l.startswith(_RESULT_PREFIX))
+        result = json.loads(line[len(_RESULT_PREFIX):])
+        result["server"] = stub.stats.snapshot()
+        report["scenarios"].append(result)
+        print_scenario(result)
+    return report
+
+
+def print_scenario(result: Dict) -> None:
+    print(f"\n{result['titles']} titles ({result['scraped']} scraped)")
+    print(f"{'stage':<18} {'titles/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'rss MB':>8} {'MB served':>10}")
+    for name, stage in result["stages"].items():
+        print(f"{name:<18} {stage['titles_per_s']:>10.1f} {stage['p50_ms']:>9.2f} {stage['p99_ms']:>9.2f} "
+              f"{stage['peak_rss_mb']:>8.1f} {stage['bytes'] / 1e6:>10.1f}")
+
+
+def compare(old_path: Path, new_path: Path) -> None:
+    old, new = (json.loads(p.read_text()) for p in (old_path, new_path))
+    print(f"{old['commit']} -> {new['commit']}")
+    old_by_size = {s["titles"]: s for s in old["scenarios"]}
+    for scenario in new["scenarios"]:
+        base = old_by_size.get(scenario["titles"])
+        if base is None:
+            continue
+        print(f"\n{scenario['titles']} titles")
+        for name, stage in scenario["stages"].items():
+            if name not in base["stages"]:
+                continue
+            before = base["stages"][name]
+            change = (stage["titles_per_s"] / before["titles_per_s"] - 1) * 100 if before["titles_per_s"] else 0
+            print(f"{name:<18} {before['titles_per_s']:>10.1f} -> {stage['titles_per_s']:>10.1f} titles/s "
+                  f"({change:+.1f} %)   p99 {before['p99_ms']:.1f} -> {stage['p99_ms']:.1f} ms   "
+                  f"rss {before['peak_rss_mb']:.0f} -> {stage['peak_rss_mb']:.0f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, nargs="+", default=[250, 1_000])
+    parser.add_argument("--sinks", nargs="+", default=["csv", "parquet"], help="csv, parquet, postgres")
+    parser.add_argument("--engine", default="async", choices=["async", "threads"])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--parse-workers", default="0", help="PARSE_WORKERS (0 = inline, auto = one per core)")
+    parser.add_argument("--detail-source", default="html", choices=["html", "graphql"])
+    parser.add_argument("--host-rps", type=float, default=0, help="RATE_LIMIT_HOST_RPS (0 = unlimited)")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("BATCH_SIZE", 1_000)))
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument("--page-kb", type=int, default=100, help="padding of synthetic title pages")
+    parser.add_argument("--graphql-null-rate", type=float, default=0.0, help="share of null GraphQL titles")
+    parser.add_argument("--output", type=Path, help="results file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        # the scraper logs to stdout too; the driver looks for this prefix
+        print(_RESULT_PREFIX + json.dumps(run_scenario(json.loads(args.scenario))))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run_all(args)
+    output = args.output or RESULTS_DIR / f"{report['commit']}{'-dirty' if report['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
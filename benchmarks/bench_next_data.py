@@ -0,0 +1,141 @@
+"""
+Micro-benchmark: __NEXT_DATA__ extraction from title pages.
+
+Compares the full BeautifulSoup parse against the raw byte scan, with
+stdlib json and (when installed) orjson.
+
+    python -m benchmarks.bench_next_data                    # pages in benchmarks/pages
+    python -m benchmarks.bench_next_data --record 20        # record 20 pages first
+    python -m benchmarks.bench_next_data --pages /some/dir --repeat 20
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from statistics import median
+
+from bs4 import BeautifulSoup
+
+from utils import next_data
+
+DEFAULT_PAGES = Path(__file__).parent / "pages"
+
+
+def bs4_extract(content: bytes):
+    soup = BeautifulSoup(content, "html.parser")
+    return json.loads(soup.find("script", {"id": "__NEXT_DATA__"}).contents[0])
+
+
+def scan_stdlib(content: bytes):
+    return json.loads(next_data.find_next_data(content))
+
+
+def scan_fast(content: bytes):
+    return next_data.extract_next_data(content)
+
+
+def synthetic_details(i: int, cast_size: int = 18) -> dict:
+    """The mainColumnData of synthetic title `i` (also what the stub's GraphQL endpoint returns)."""
+    return {
+        "id": f"tt{i:07d}",
+        "originalTitleText": {"text": f"Synthetic Movie {i}"},
+        "releaseDate": {"year": 1950 + i % 75},
+        "ratingsSummary": {"aggregateRating": 8.0},
+        "runtime": {"seconds": 7200},
+        "cast": {
+            "edges": [
+                {"node": {"name": {"id": f"nm{i * 100 + k:07d}",
+                                   "nameText": {"text": f"Actor {k}"}}}}
+                for k in range(cast_size)
+            ]
+        },
+    }
+
+
+def synthetic_page(i: int, cast_size: int = 18, padding_kb: int = 400) -> bytes:
+    """Title page shaped like imdb.com/title/<id>: a large body plus __NEXT_DATA__."""
+    payload = {
+        "props": {
+            "pageProps": {
+                "mainColumnData": synthetic_details(i, cast_size),
+                "aboveTheFoldData": {"metacritic": {"metascore": {"score": 80}}},
+            }
+        }
+    }
+    filler = "<div class=\"ipc-block\"><span>lorem ipsum</span></div>\n" * (padding_kb * 20)
+    return (
+        "<!DOCTYPE html><html><head><title>t</title></head><body>"
+        + filler
+        + '<script id="__NEXT_DATA__" type="application/json">'
+        + json.dumps(payload)
+        + "</script></body></html>"
+    ).encode()
+
+
+def record_pages(target: Path, count: int) -> None:
+    """Download the first `count` titles of the chart (IMDB_URL or the default Top 250) into `target`."""
+    import os
+    from scrapers.imdb import DEFAULT_CHART_URL, IMDBScraper
+
+    scraper = IMDBScraper()
+    chart = scraper.request_handler.get(
+        os.getenv("IMDB_URL", DEFAULT_CHART_URL), headers=scraper.api_headers, use_proxy=False, verify_proxy=False
+    )
+    target.mkdir(parents=True, exist_ok=True)
+    for edge in chart.json()["data"]["chartTitles"]["edges"][:count]:
+        imdb_id = edge["node"]["id"]
+        response = scraper.request_handler.get(
+            f"{scraper.base_url}/title/{imdb_id}",
+            headers=scraper.api_headers, use_proxy=False, verify_proxy=False,
+        )
+        (target / f"{imdb_id}.html").write_bytes(response.content)
+
+
+def load_pages(directory: Path) -> list:
+    pages = [p.read_bytes() for p in sorted(directory.glob("*.html"))]
+    if not pages:
+        print(f"No recorded pages in {directory}, using 10 synthetic pages")
+        pages = [synthetic_page(i) for i in range(10)]
+    return pages
+
+
+def bench(fn, pages: list, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        for page in pages:
+            start = time.perf_counter()
+            fn(page)
+            timings.append(time.perf_counter() - start)
+    return {"median_ms": median(timings) * 1000, "total_s": sum(timings)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=Path, default=DEFAULT_PAGES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--record", type=int, default=0, help="record N chart titles before benchmarking")
+    args = parser.parse_args()
+
+    if args.record:
+        record_pages(args.pages, args.record)
+
+    pages = load_pages(args.pages)
+    avg_kb = sum(len(p) for p in pages) / len(pages) / 1024
+    print(f"{len(pages)} pages, {avg_kb:.0f} KB avg, {args.repeat} repeats")
+
+    cases = {"bs4 + json": bs4_extract, "scan + json": scan_stdlib}
+    if next_data.orjson is not None:
+        cases["scan + orjson"] = scan_fast
+
+    expected = bs4_extract(pages[0])
+    baseline = None
+    for name, fn in cases.items():
+        assert fn(pages[0]) == expected, f"{name} disagrees with bs4"
+        result = bench(fn, pages, args.repeat)
+        baseline = baseline or result["median_ms"]
+        print(f"{name:<15} median {result['median_ms']:8.3f} ms/page   "
+              f"x{baseline / result['median_ms']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
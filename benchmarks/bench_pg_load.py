@@ -0,0 +1,74 @@
+"""
+Benchmark: PostgresHandler load paths (COPY + staging merge vs execute_batch).
+
+Loads synthetic movies into a scratch database (POSTGRES_BENCH_DB, default
+imdb_bench) using the regular POSTGRES_* connection settings. The analytics
+refresh that normally follows each stream is disabled, so only the load
+itself is timed.
+
+    python -m benchmarks.bench_pg_load                # about 6.5 min, mostly the 1M size
+    python -m benchmarks.bench_pg_load --sizes 250 10000 --actors 5
+
+Results are listed in the README (Benchmarks).
+"""
+import argparse
+import os
+import time
+
+from models.movie_model import Actor, Movie
+
+
+def synthetic_movies(count: int, actors_per_movie: int, seed: int = 0):
+    for i in range(count):
+        movie_id = f"tt{i:08d}"
+        yield Movie(
+            movie_id=movie_id,
+            title=f"Synthetic Movie {i}",
+            year=1920 + i % 105,
+            rating=round(5 + (i * 7 + seed) % 50 / 10, 1),
+            duration=80 + i % 120,
+            actors=tuple(
+                Actor(actor_id=f"nm{(i + k) % 50_000:07d}", name=f"Actor {(i + k) % 50_000}")
+                for k in range(actors_per_movie)
+            ),
+            metascore=40 + (i + seed) % 60,
+        )
+
+
+def run(handler, method: str, count: int, actors: int, batch_size: int) -> float:
+    with handler.connection() as conn, conn.cursor() as cur:
+        cur.execute("TRUNCATE movies CASCADE")
+        conn.commit()
+
+    handler.load_method = method
+    start = time.perf_counter()
+    handler.save_stream(synthetic_movies(count, actors), batch_size=batch_size)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 10_000, 1_000_000])
+    parser.add_argument("--actors", type=int, default=3, help="actors per synthetic movie")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("BATCH_SIZE", 1_000)))
+    parser.add_argument("--methods", nargs="+", default=["copy", "batch"])
+    args = parser.parse_args()
+
+    os.environ["POSTGRES_DB"] = os.getenv("POSTGRES_BENCH_DB", "imdb_bench")
+    # save_stream refreshes the analytics tables afterwards; time the load paths alone
+    os.environ["PG_ANALYTICS_ENABLED"] = "false"
+    from persistence.postgres_handler import PostgresHandler
+
+    handler = PostgresHandler()
+    try:
+        print(f"{'rows':>10} {'method':>6} {'seconds':>9} {'movies/s':>10}")
+        for size in args.sizes:
+            for method in args.methods:
+                elapsed = run(handler, method, size, args.actors, args.batch_size)
+                print(f"{size:>10} {method:>6} {elapsed:>9.2f} {size / elapsed:>10.0f}")
+    finally:
+        handler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Local stand-in for the IMDb endpoints the scraper talks to.
+
+Serves the Top-250 GraphQL chart (cursor pagination over `variables.first`
+/ `variables.after`) for a synthetic chart of any size, and /title/<id>
+pages. Title pages come from recorded pages in benchmarks/pages when there
+are any (their id is rewritten to the one requested), otherwise from
+bench_next_data.synthetic_page. A POST of the TitleDetails query (any path)
+returns the synthetic details of the requested ids; --graphql-null-rate
+makes a share of them come back null to exercise the HTML fallback.
+
+Latency, server errors and 429s are configurable; GET /__stats returns the
+request, status and byte counters.
+
+    python -m benchmarks.stub_server --titles 10000 --latency-ms 80 --throttle-rate 0.02
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.bench_next_data import DEFAULT_PAGES, synthetic_details, synthetic_page
+
+CHART_QUERY = (
+    '/?operationName=Top250MoviesPagination'
+    '&variables={"first":250,"isInPace":false,"locale":"en-US"}'
+    '&extensions={"persistedQuery":{"sha256Hash":"bench","version":1}}'
+)
+_TITLE_ID = re.compile(r"tt\d+")
+
+
+@dataclass
+class StubConfig:
+    titles: int = 250
+    latency_ms: float = 50.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    page_kb: int = 100
+    graphql_null_rate: float = 0.0
+    pages_dir: Optional[Path] = DEFAULT_PAGES
+    seed: int = 0
+
+
+@dataclass
+class StubStats:
+    requests: int = 0
+    bytes_sent: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+    def snapshot(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "bytes_sent": self.bytes_sent,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+        }
+
+
+def title_id(i: int) -> str:
+    return f"tt{i:07d}"
+
+
+def chart_page(titles: int, first: int, after: Optional[str]) -> Dict:
+    start = int(after or 0)
+    end = min(titles, start + first)
+    return {
+        "data": {
+            "chartTitles": {
+                "pageInfo": {"hasNextPage": end < titles, "endCursor": str(end)},
+                "edges": [
+                    {
+                        "currentRank": i + 1,
+                        "node": {
+                            "id": title_id(i),
+                            "ratingsSummary": {"aggregateRating": round(7.5 + (i % 25) / 10, 1)},
+                        },
+                    }
+                    for i in range(start, end)
+                ],
+            }
+        }
+    }
+
+
+def graphql_title(i: int) -> Dict:
+    return {**synthetic_details(i), "metacritic": {"metascore": {"score": 80}}}
+
+
+class StubIMDb:
+    """Threaded HTTP server; start() returns the base URL, stop() shuts it down."""
+
+    def __init__(self, config: Optional[StubConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StubConfig()
+        self.stats = StubStats()
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._recorded = self._load_recorded(self.config.pages_dir)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _load_recorded(directory: Optional[Path]) -> List[tuple]:
+        pages = []
+        for path in sorted(directory.glob("*.html")) if directory else []:
+            # recorded as <imdb id>.html by bench_next_data --record
+            if _TITLE_ID.fullmatch(path.stem):
+                pages.append((path.stem.encode(), path.read_bytes()))
+        return pages
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def chart_url(self) -> str:
+        return self.base_url + CHART_QUERY
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-imdb", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def title_page(self, imdb_id: str) -> bytes:
+        i = int(imdb_id[2:])
+        if self._recorded:
+            recorded_id, content = self._recorded[i % len(self._recorded)]
+            return content.replace(recorded_id, imdb_id.encode())
+        return synthetic_page(i, padding_kb=self.config.page_kb)
+
+    def _outcome(self) -> Optional[int]:
+        """Injected failure for this request, if any."""
+        with self._lock:
+            roll = self._random.random()
+            delay = max(0.0, self._random.gauss(self.config.latency_ms, self.config.jitter_ms)) / 1000
+        time.sleep(delay)
+        if roll < self.config.throttle_rate:
+            return 429
+        if roll < self.config.throttle_rate + self.config.error_rate:
+            return 503
+        return None
+
+    def _record(self, status: int, size: int) -> None:
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.bytes_sent += size
+            self.stats.statuses[status] = self.stats.statuses.get(status, 0) + 1
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(
+                self, status: int, body: bytes, content_type: str, headers: Dict = None, record: bool = True
+            ) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+                if record:
+                    stub._record(status, len(body))
+
+            def do_GET(self) -> None:
+                if self.path == "/__stats":
+                    body = json.dumps(stub.stats.snapshot()).encode()
+                    return self._send(200, body, "application/json", record=False)
+
+                failure = stub._outcome()
+                if failure == 429:
+                    return self._send(429, b"", "text/plain", {"Retry-After": str(stub.config.retry_after)})
+                if failure:
+                    return self._send(failure, b"", "text/plain")
+
+                parts = urlsplit(self.path)
+                if parts.path.startswith("/title/"):
+                    imdb_id = parts.path.split("/")[2]
+                    return self._send(200, stub.title_page(imdb_id), "text/html; charset=utf-8")
+
+                variables = json.loads(parse_qs(parts.query).get("variables", ["{}"])[0])
+                body = chart_page(stub.config.titles, int(variables.get("first", 250)), variables.get("after"))
+                self._send(200, json.dumps(body).encode(), "application/json")
+
+            def do_POST(self) -> None:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                failure = stub._outcome()
+                if failure == 429:
+                    return self._send(429, b"", "text/plain", {"Retry-After": str(stub.config.retry_after)})
+                if failure:
+                    return self._send(failure, b"", "text/plain")
+
+                ids = request.get("variables", {}).get("ids", [])
+                with stub._lock:
+                    nulls = [stub._random.random() < stub.config.graphql_null_rate for _ in ids]
+                titles = [None if null else graphql_title(int(imdb_id[2:])) for imdb_id, null in zip(ids, nulls)]
+                self._send(200, json.dumps({"data": {"titles": titles}}).encode(), "application/json")
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--titles", type=int, default=250)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument("--page-kb", type=int, default=100, help="padding of synthetic title pages")
+    parser.add_argument("--graphql-null-rate", type=float, default=0.0, help="share of null GraphQL titles")
+    args = parser.parse_args()
+
+    stub = StubIMDb(
+        StubConfig(
+            titles=args.titles, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate, throttle_rate=args.throttle_rate, page_kb=args.page_kb,
+            graphql_null_rate=args.graphql_null_rate,
+        ),
+        port=args.port,
+    )
+    stub.start()
+    print(f"IMDB_BASE_URL={stub.base_url}")
+    print(f"IMDB_URL='{stub.chart_url}'")
+    print(f"GRAPHQL_URL={stub.base_url}/graphql")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 from typing import Literal
 from persistence.postgres_handler import PostgresHandler
 from persistence.csv_handler import CSVHandler
+from persistence.parquet_handler import ParquetHandler
 from persistence.base_persistence import BasePersistence
 
-PersistenceType = Literal['postgres', 'csv']
+PersistenceType = Literal['postgres', 'csv', 'parquet']
 
 class PersistenceFactory:
     @staticmethod
@@ -12,7 +13,7 @@ class PersistenceFactory:
         Create a persitence instance with the specified type
 
         Args:
-            p_type: persistence type ('postgres' or 'csv')
+            p_type: persistence type ('postgres', 'csv' or 'parquet')
             
         Returns:
             BasePersistence instance
@@ -22,7 +23,8 @@ class PersistenceFactory:
         """
         implementations = {
             'postgres': PostgresHandler,
-            'csv': CSVHandler
+            'csv': CSVHandler,
+            'parquet': ParquetHandler
         }
         
         if p_type not in implementations:
@@ -1,14 +1,27 @@
+import argparse
 import os
-import itertools
 from factories.scraper_factory import ScraperFactory
 from factories.persistence_factory import PersistenceFactory
+from scrapers.imdb import DEFAULT_CHART_URL
+from persistence.fanout import FanOutDispatcher
 from utils.logging_config import setup_logger
 from utils.request_handler import RequestHandler
 from utils.proxy_handler import ProxyHandler
+from utils.scrape_state import ScrapeState
+from utils.checkpoint import CheckpointJournal
+from persistence.pg_work_queue import PgWorkQueue
+from utils import metrics
 
-def main():
+def main(resume: bool = False, role: str = "standalone"):
     logger = setup_logger(__name__)
     logger.info("Starting IMDB Top Movies Scraper")
+    metrics.start_exporter()
+    request_handler = None
+    proxy_handler = None
+    journal = None
+    work_queue = None
+    succeeded = False
+    sinks = {}
 
     try:
         proxy_enabled = os.getenv('PROXY_ENABLED', 'false').lower() == 'true'
@@ -19,37 +32,116 @@ def main():
 
         scraper = ScraperFactory.create_scraper('imdb', request_handler=request_handler)
 
-        csv_handler   = PersistenceFactory.create_persistence('csv')
-        pg_handler    = PersistenceFactory.create_persistence('postgres')
+        imdb_url = os.getenv('IMDB_URL', DEFAULT_CHART_URL)
 
-        imdb_url = os.getenv(
-            'IMDB_URL',
-            'https://caching.graphql.imdb.com/?operationName=Top250MoviesPagination&variables={"first":250,"isInPace":false,"locale":"en-US"}&extensions={"persistedQuery":{"sha256Hash":"2db1d515844c69836ea8dc532d5bff27684fdce990c465ebf52d36d185a187b3","version":1}}'
-        )
-        logger.info(f"Scraping {imdb_url}")
+        if role == "coordinator":
+            # load the chart into the work queue; workers fetch the details
+            work_queue = PgWorkQueue()
+            work_queue.enqueue(scraper.chart_edges(imdb_url))
+            if os.getenv("WORK_QUEUE_WAIT", "true").lower() == "true":
+                counts = work_queue.wait_until_drained()
+                if counts.get("failed"):
+                    logger.warning("%s titles failed on every attempt", counts["failed"])
+            return
+
+        backends = [b.strip() for b in os.getenv('PERSISTENCE_BACKENDS', 'csv,postgres').split(',') if b.strip()]
+        sinks = {name: PersistenceFactory.create_persistence(name) for name in backends}
+        pg_handler = sinks.get('postgres')
+
+        if role == "worker":
+            work_queue = PgWorkQueue()
+            logger.info("Worker %s pulling run '%s'", work_queue.worker_id, work_queue.run_id)
+        else:
+            logger.info("Scraping %s", imdb_url)
 
         batch_size = int(os.getenv("BATCH_SIZE", 1_000))
-        movies_stream = scraper.extract_data(imdb_url, use_proxy=False, verify_proxy=False)
 
-        # tee the stream so we write CSV and Postgres without double scraping
-        csv_stream, pg_stream = itertools.tee(movies_stream)
+        state = None
+        if os.getenv("SCRAPE_MODE", "full").lower() == "incremental":
+            if os.getenv("STATE_SOURCE", "file").lower() == "postgres" and pg_handler:
+                state = ScrapeState(pg_handler.load_chart_state())
+            else:
+                state = ScrapeState.from_file()
+
+        # a worker's progress is kept by the work queue itself
+        if os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true" and work_queue is None:
+            journal = CheckpointJournal(resume=resume)
+        elif resume:
+            logger.warning("--resume ignored: CHECKPOINT_ENABLED=false or running as a worker")
+
+        def scrape(edges=None) -> None:
+            """Scrape the chart (or `edges`) into every sink; raises if a sink failed."""
+            movies_stream = scraper.extract_data(
+                imdb_url, use_proxy=False, verify_proxy=False, state=state, journal=journal, edges=edges
+            )
+            if work_queue is not None:
+                movies_stream = work_queue.track(movies_stream)
+
+            # fan the stream out so every backend writes concurrently with the scrape
+            dispatcher = FanOutDispatcher(sinks)
+            results = dispatcher.run(movies_stream, batch_size=batch_size)
+
+            for name, result in results.items():
+                if result.ok:
+                    logger.info("%s: wrote %s rows", name, result.written)
+                else:
+                    logger.error("%s: failed after %s rows: %s", name, result.received, result.error)
 
-        csv_count  = csv_handler.save_stream(csv_stream,  batch_size=batch_size)
-        pg_count   = pg_handler.save_stream(pg_stream,   batch_size=batch_size)
+            failed = [name for name, result in results.items() if not result.ok]
+            if failed:
+                raise RuntimeError(f"Sinks failed: {', '.join(failed)}")
+            # only now are the titles marked fetched actually stored
+            if state is not None:
+                state.save()
 
-        logger.info(f"CSV  : wrote {csv_count} rows")
-        logger.info(f"Postgres: wrote {pg_count} rows")
+        if work_queue is not None:
+            # settle every claimed batch as soon as its sinks are done with it
+            for batch in work_queue.claimed_batches():
+                unchanged = [
+                    edge["node"]["id"] for edge in batch if state is not None and not state.needs_fetch(edge)
+                ]
+                scrape(batch)
+                work_queue.settle(success=True, done=unchanged)
+        else:
+            scrape()
+        succeeded = True
+        if journal is not None:
+            journal.clear()
 
     except Exception as e:
-        logger.error(f"Fatal error: {e}", exc_info=True)
+        logger.error("Fatal error: %s", e, exc_info=True)
         raise
     finally:
-        try:
-            pg_handler.close()
-        except Exception:
-            pass
+        if journal is not None:
+            journal.close()
+        if work_queue is not None:
+            try:
+                if role == "worker":
+                    work_queue.finish(success=succeeded)
+            finally:
+                work_queue.close()
+        for sink in sinks.values():
+            try:
+                sink.close()
+            except Exception:
+                pass
+        if request_handler:
+            request_handler.close()
+        if proxy_handler:
+            proxy_handler.close()
+        metrics.shutdown()
         logger.info("Scraping finished")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Scrape the IMDb Top 250 chart")
+    parser.add_argument(
+        '--resume', action='store_true',
+        help="continue an interrupted run: replay the titles in the checkpoint journal, fetch only the rest",
+    )
+    parser.add_argument(
+        '--role', choices=['standalone', 'coordinator', 'worker'], default='standalone',
+        help="standalone scrapes the whole chart; coordinator queues it in Postgres for workers to claim",
+    )
+    args = parser.parse_args()
     os.environ.setdefault('PROXY_ENABLED', 'false')
-    main()
\ No newline at end of file
+    main(resume=args.resume, role=args.role)
\ No newline at end of file
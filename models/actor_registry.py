@@ -0,0 +1,37 @@
+import sys
+import threading
+from typing import Dict, Iterator
+
+from .movie_model import Actor
+
+
+class ActorRegistry:
+    """
+    One Actor per person for the whole run.
+
+    The same people show up across many titles; the registry hands every
+    movie a reference to a single shared (frozen) Actor and interns its id
+    and name, instead of building a fresh object and strings per cast entry.
+    Safe to use from the fetch threads and the event loop at the same time.
+    """
+
+    def __init__(self) -> None:
+        self._actors: Dict[str, Actor] = {}
+        self._lock = threading.Lock()
+
+    def get(self, actor_id: str, name: str) -> Actor:
+        """Return the registered Actor for actor_id, creating it on first sight."""
+        actor = self._actors.get(actor_id)
+        if actor is None:
+            with self._lock:
+                actor = self._actors.get(actor_id)
+                if actor is None:
+                    actor = Actor(actor_id=sys.intern(actor_id), name=sys.intern(name))
+                    self._actors[actor.actor_id] = actor
+        return actor
+
+    def __len__(self) -> int:
+        return len(self._actors)
+
+    def __iter__(self) -> Iterator[Actor]:
+        return iter(list(self._actors.values()))
@@ -1,20 +1,20 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Optional, Tuple
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Actor:
-    name: str
-    movie_id: str
+    # shared between every movie the person appears in, see ActorRegistry
     actor_id: str
+    name: str
 
-@dataclass
+@dataclass(slots=True)
 class Movie:
     movie_id: str
     title: str
     year: int
     rating: float
     duration: int
-    actors: List[Actor]
+    actors: Tuple[Actor, ...] = ()
     metascore: Optional[int] = None
 
     def to_dict(self):
@@ -24,5 +24,19 @@ class Movie:
             'rating': self.rating,
             'duration': self.duration,
             'metascore': self.metascore,
-            'actors': [{"name":actor.name, "actor_id":actor.actor_id} for actor in self.actors] if self.actors else []
-        }
\ No newline at end of file
+            'actors': [{"name":actor.name, "actor_id":actor.actor_id} for actor in self.actors]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, registry=None) -> "Movie":
+        """Rebuild a Movie from to_dict() output plus its movie_id; actors go through `registry` when given"""
+        make_actor = registry.get if registry is not None else Actor
+        return cls(
+            movie_id=data['movie_id'],
+            title=data['title'],
+            year=data['year'],
+            rating=data['rating'],
+            duration=data['duration'],
+            actors=tuple(make_actor(actor_id=a["actor_id"], name=a["name"]) for a in data.get('actors', ())),
+            metascore=data.get('metascore')
+        )
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Iterator
+from typing import Iterator, Optional
 
 from models.movie_model import Movie
 
@@ -7,6 +7,8 @@ from models.movie_model import Movie
 class BasePersistence(ABC):
     """
     persistence interface.
+    Writing is required; the query methods are optional and raise
+    NotImplementedError on backends that cannot answer them.
     """
 
     @abstractmethod
@@ -17,6 +19,18 @@ class BasePersistence(ABC):
         """
         pass
 
+    def get_movies_by_year(self, year: int) -> Iterator[Movie]:
+        """Movies released in `year`."""
+        raise NotImplementedError(f"{type(self).__name__} does not support queries")
+
+    def get_movie(self, movie_id: str) -> Optional[Movie]:
+        """One movie by IMDb id, or None."""
+        raise NotImplementedError(f"{type(self).__name__} does not support queries")
+
+    def get_movies_by_actor(self, actor_id: str) -> Iterator[Movie]:
+        """Movies whose cast includes `actor_id`."""
+        raise NotImplementedError(f"{type(self).__name__} does not support queries")
+
     @abstractmethod
     def close(self) -> None:
         """Release any open resources (DB connections, file handles, etc.)."""
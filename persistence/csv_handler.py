@@ -1,21 +1,116 @@
 import csv
+import glob
+import gzip
+import io
+import os
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Iterator
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from models.movie_model import Movie, Actor
+from models.movie_model import Movie
+from models.actor_registry import ActorRegistry
 from .base_persistence import BasePersistence
+from .csv_index import CsvIndex, movie_from_row
+from utils import metrics
+
+try:  # optional dependency, only needed for CSV_COMPRESSION=zstd
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+FIELDNAMES = ("movie_id", "title", "year", "rating", "duration", "metascore", "actors")
+EXTENSIONS = {"none": ".csv", "gzip": ".csv.gz", "zstd": ".csv.zst"}
+# <YYYYmmdd>_<HHMMSS>_<part> after the prefix, so "imdb_movies" never matches "imdb_movies_extra_..."
+PART_PATTERN = "[0-9]" * 8 + "_" + "[0-9]" * 6 + "_" + "[0-9]" * 4
 
 
 class CSVHandler(BasePersistence):
     """
     Stream movies to CSV, one per line.
+
+    Files are named <CSV_OUTPUT_DIR>/<CSV_FILENAME_PREFIX>_<YYYYmmdd_HHMMSS>_<part>.csv
+    and can be compressed on the fly (CSV_COMPRESSION=gzip|zstd; .csv.gz /
+    .csv.zst). A new part is started once the current one reaches
+    CSV_MAX_ROWS rows or CSV_MAX_MB on disk (checked after every batch;
+    0 = no limit).
+
+    With CSV_APPEND=true the run continues the newest existing part for
+    the prefix instead of starting a new file; compressed parts get a new
+    gzip member / zstd frame, which standard readers concatenate.
+
+    Queries (get_movies_by_year / get_movie / get_movies_by_actor) search
+    every export with the prefix in the output dir, see CsvIndex.
     """
 
-    def __init__(self, output_dir: str = "data") -> None:
-        self.output_dir = Path(output_dir)
+    def __init__(self, output_dir: Optional[str] = None) -> None:
+        self.output_dir = Path(output_dir or os.getenv("CSV_OUTPUT_DIR", "data"))
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.filename = self.output_dir / f"imdb_movies_{datetime.now():%Y%m%d_%H%M%S}.csv"
+        self.prefix = os.getenv("CSV_FILENAME_PREFIX", "imdb_movies")
+        self.compression = os.getenv("CSV_COMPRESSION", "none").lower()
+        if self.compression not in EXTENSIONS:
+            raise ValueError(f"CSV_COMPRESSION must be one of {list(EXTENSIONS)}, got '{self.compression}'")
+        if self.compression == "zstd" and zstandard is None:
+            raise ImportError("CSV_COMPRESSION=zstd requires zstandard: pip install zstandard")
+        self.level = int(os.getenv("CSV_COMPRESSION_LEVEL") or (6 if self.compression == "gzip" else 3))
+        self.max_rows = int(os.getenv("CSV_MAX_ROWS", 0))
+        self.max_bytes = float(os.getenv("CSV_MAX_MB", 0)) * 1024 * 1024
+        self.append = os.getenv("CSV_APPEND", "false").lower() == "true"
+
+        self.extension = EXTENSIONS[self.compression]
+        self.stamp = f"{datetime.now():%Y%m%d_%H%M%S}"
+        self.part = 1
+        self._resume_rows = 0
+        self._indexes: Dict[Path, CsvIndex] = {}
+        if self.append:
+            self._continue_latest()
+        self.filename = self._path()
+
+    def _path(self) -> Path:
+        return self.output_dir / f"{self.prefix}_{self.stamp}_{self.part:04d}{self.extension}"
+
+    def _continue_latest(self) -> None:
+        """Point at the newest existing part for this prefix and compression, if any."""
+        parts = sorted(self._parts(self.extension))
+        if not parts:
+            return
+        latest = parts[-1]
+        stem = latest.name[len(self.prefix) + 1:-len(self.extension)]
+        self.stamp, part = stem.rsplit("_", 1)
+        self.part = int(part)
+        if self.max_rows:
+            self._resume_rows = self._count_rows(latest)
+        logger.info("Appending to %s", latest)
+
+    def _count_rows(self, path: Path) -> int:
+        lines = 0
+        with self._open_binary_reader(path) as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                lines += chunk.count(b"\n")
+        return max(0, lines - 1)  # header
+
+    def _open_binary_reader(self, path: Path):
+        if self.compression == "gzip":
+            return gzip.open(path, "rb")
+        if self.compression == "zstd":
+            return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+        return open(path, "rb")
+
+    def _open(self, path: Path):
+        """Text handle for `path`, appending when it exists; the compressor streams as rows are written."""
+        mode = "a" if path.exists() else "w"
+        if self.compression == "gzip":
+            return gzip.open(path, mode + "t", compresslevel=self.level, newline="", encoding="utf-8")
+        if self.compression == "zstd":
+            compressor = zstandard.ZstdCompressor(level=self.level)
+            return io.TextIOWrapper(
+                compressor.stream_writer(open(path, mode + "b")), encoding="utf-8", newline=""
+            )
+        return path.open(mode, newline="", encoding="utf-8")
 
     # ------------------------------------------------------------------
     # streaming save
@@ -25,43 +120,180 @@ class CSVHandler(BasePersistence):
         Persist an iterator of Movie objects to CSV.
         Returns the total number of rows written.
         """
-        fieldnames = ["movie_id", "title", "year", "rating", "duration", "metascore", "actors"]
         written = 0
+        part_rows = self._resume_rows
+        part_full = bool(self.max_bytes) and self.filename.exists() and self.filename.stat().st_size >= self.max_bytes
+        file = writer = None
+
+        def open_part() -> None:
+            nonlocal file, writer
+            self.filename = self._path()
+            is_new = not self.filename.exists()
+            file = self._open(self.filename)
+            writer = csv.writer(file)
+            if is_new:
+                writer.writerow(FIELDNAMES)
 
-        with self.filename.open("w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
+        def write(rows: list[Tuple]) -> None:
+            # parts roll over lazily, so a run never ends on an empty part
+            nonlocal part_rows, part_full, written
+            started = time.perf_counter()
+            while rows:
+                if part_full or (self.max_rows and part_rows >= self.max_rows):
+                    roll()
+                take = len(rows) if not self.max_rows else min(len(rows), self.max_rows - part_rows)
+                writer.writerows(rows[:take])
+                rows = rows[take:]
+                part_rows += take
+                written += take
+            metrics.FLUSH_SECONDS.observe(time.perf_counter() - started, "csv", self.compression)
+            part_full = bool(self.max_bytes) and self.filename.stat().st_size >= self.max_bytes
 
-            buf: list[Movie] = []
+        def roll() -> None:
+            nonlocal part_rows, part_full
+            file.close()
+            logger.info("Rolled over %s after %s rows", self.filename, part_rows)
+            self.part += 1
+            part_rows, part_full = 0, False
+            open_part()
+
+        open_part()
+        try:
+            buf: list[Tuple] = []
             for movie in movies:
-                buf.append(movie)
+                buf.append(self._row(movie))
                 if len(buf) >= batch_size:
-                    writer.writerows(self._rows_from_buffer(buf))
-                    written += len(buf)
-                    buf.clear()
+                    metrics.FLUSH_ROWS.observe(len(buf), "csv")
+                    write(buf)
+                    buf = []
 
             if buf:  # tail
-                writer.writerows(self._rows_from_buffer(buf))
-                written += len(buf)
+                metrics.FLUSH_ROWS.observe(len(buf), "csv")
+                write(buf)
+        finally:
+            file.close()
+        self._resume_rows = part_rows
 
         return written
 
-    def _rows_from_buffer(self, buf: list[Movie]) -> list[dict]:
-        return [
-            {
-                "movie_id": m.movie_id,
-                "title": m.title,
-                "year": m.year,
-                "rating": m.rating,
-                "duration": m.duration,
-                "metascore": m.metascore,
-                "actors": "|".join(f"{a.actor_id}:{a.name}" for a in m.actors),
-            }
-            for m in buf
-        ]
+    @staticmethod
+    def _row(m: Movie) -> Tuple:
+        return (
+            m.movie_id,
+            m.title,
+            m.year,
+            m.rating,
+            m.duration,
+            m.metascore,
+            "|".join(f"{a.actor_id}:{a.name}" for a in m.actors),
+        )
 
+    # ------------------------------------------------------------------
+    # queries
+    # ------------------------------------------------------------------
     def get_movies_by_year(self, year: int) -> Iterator[Movie]:
-        raise NotImplementedError("CSV does not support queries")
+        return self._query("year", str(year))
+
+    def get_movie(self, movie_id: str) -> Optional[Movie]:
+        return next(self._query("id", movie_id), None)
+
+    def get_movies_by_actor(self, actor_id: str) -> Iterator[Movie]:
+        return self._query("actor", actor_id)
+
+    def _query(self, kind: str, key: str) -> Iterator[Movie]:
+        """
+        Search every export with this prefix, yielding each matching movie
+        once in its latest version. A row that matches may have been
+        replaced later (appended again, or re-exported) with another year
+        or cast, so every hit is resolved to the newest row of its movie_id
+        across all exports and kept only if that row still matches. Plain
+        parts are answered from their sidecar index; compressed parts
+        cannot be memory-mapped and are scanned.
+        """
+        registry = ActorRegistry()
+        exports = [path for path in self._exports() if self._readable(path)]
+
+        hits: Dict[str, None] = {}  # movie ids in order of discovery
+        for path in exports:
+            if path.name.endswith(EXTENSIONS["none"]):
+                index = self._index(path)
+                for movie in index.read(index.offsets(kind, key), registry):
+                    hits.setdefault(movie.movie_id)
+            else:
+                for row in self._rows(path):
+                    if self._row_matches(row, kind, key):
+                        hits.setdefault(row[0])
+
+        latest: Dict[str, Movie] = {}
+        remaining = set(hits)
+        for path in exports:  # newest first
+            if not remaining:
+                break
+            if path.name.endswith(EXTENSIONS["none"]):
+                index = self._index(path)
+                found = [movie_id for movie_id in remaining if movie_id in index.by_id]
+                for movie in index.read([index.by_id[movie_id] for movie_id in found], registry):
+                    latest[movie.movie_id] = movie
+            else:
+                for row in self._rows(path):
+                    if row[0] in remaining:  # later rows of the part replace earlier ones
+                        latest[row[0]] = movie_from_row(row, registry)
+            remaining -= latest.keys()
+
+        for movie_id in hits:
+            movie = latest[movie_id]
+            if self._movie_matches(movie, kind, key):
+                yield movie
+
+    def _exports(self) -> List[Path]:
+        """Every export with this prefix, newest first."""
+        return sorted(
+            (p for ext in EXTENSIONS.values() for p in self._parts(ext)),
+            key=lambda p: p.name,
+            reverse=True,
+        )
+
+    def _parts(self, extension: str) -> Iterator[Path]:
+        """Exports written by this prefix with `extension`."""
+        return self.output_dir.glob(f"{glob.escape(self.prefix)}_{PART_PATTERN}{extension}")
+
+    def _readable(self, path: Path) -> bool:
+        if path.name.endswith(EXTENSIONS["zstd"]) and zstandard is None:
+            logger.warning("Skipping %s: reading zstd exports requires zstandard", path.name)
+            return False
+        return True
+
+    def _index(self, path: Path) -> CsvIndex:
+        index = self._indexes.get(path)
+        if index is None or not index.is_current():
+            index = self._indexes[path] = CsvIndex(path)
+        return index
+
+    @staticmethod
+    def _row_matches(row: List[str], kind: str, key: str) -> bool:
+        if kind == "actor":
+            return any(entry.partition(":")[0] == key for entry in row[6].split("|"))
+        return row[{"id": 0, "year": 2}[kind]] == key
+
+    @staticmethod
+    def _movie_matches(movie: Movie, kind: str, key: str) -> bool:
+        if kind == "actor":
+            return any(actor.actor_id == key for actor in movie.actors)
+        return (movie.movie_id if kind == "id" else str(movie.year)) == key
+
+    def _rows(self, path: Path) -> Iterator[List[str]]:
+        """Data rows of a compressed export."""
+        if path.name.endswith(EXTENSIONS["gzip"]):
+            fh = gzip.open(path, "rt", newline="", encoding="utf-8")
+        else:
+            fh = io.TextIOWrapper(
+                zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True),
+                encoding="utf-8", newline="",
+            )
+        with fh:
+            reader = csv.reader(fh)
+            next(reader, None)  # header
+            yield from reader
 
     def close(self) -> None:
-        pass
\ No newline at end of file
+        pass
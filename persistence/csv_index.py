@@ -0,0 +1,115 @@
+import csv
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from models.movie_model import Movie
+from models.actor_registry import ActorRegistry
+
+import logging
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx.json"
+
+
+def movie_from_row(row: List[str], registry: Optional[ActorRegistry] = None) -> Movie:
+    """Map one CSVHandler row back to a Movie."""
+    movie_id, title, year, rating, duration, metascore, actors = row
+    make_actor = (registry or ActorRegistry()).get
+    cast = []
+    for entry in actors.split("|") if actors else ():
+        actor_id, _, name = entry.partition(":")
+        cast.append(make_actor(actor_id=actor_id, name=name))
+    return Movie(
+        movie_id=movie_id,
+        title=title,
+        year=int(year),
+        rating=float(rating),
+        duration=int(duration) if duration else None,
+        actors=tuple(cast),
+        metascore=int(float(metascore)) if metascore else None,
+    )
+
+
+class CsvIndex:
+    """
+    Sidecar index of one plain CSV export: byte offsets of every row by
+    year, movie_id and actor_id, stored next to the file as
+    <file>.idx.json. Rows are read back through a read-only mmap, so a
+    lookup touches only the lines it returns instead of parsing the file.
+
+    The index records the size and mtime of the CSV it was built from and
+    is rebuilt when they change (e.g. the file was appended to). Rows are
+    assumed to be one per line, which holds for what CSVHandler writes.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + INDEX_SUFFIX)
+        self.by_year: Dict[str, List[int]] = {}
+        self.by_id: Dict[str, int] = {}
+        self.by_actor: Dict[str, List[int]] = {}
+        self._load_or_build()
+
+    def _signature(self) -> Dict:
+        stat = self.path.stat()
+        return {"version": INDEX_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_current(self) -> bool:
+        """False once the CSV changed after the index was loaded."""
+        return self.path.exists() and self._signature() == self.signature
+
+    def _load_or_build(self) -> None:
+        signature = self.signature = self._signature()
+        if self.index_path.exists():
+            try:
+                data = json.loads(self.index_path.read_text(encoding="utf-8"))
+                if data.get("signature") == signature:
+                    self.by_year, self.by_id, self.by_actor = data["by_year"], data["by_id"], data["by_actor"]
+                    return
+            except (ValueError, KeyError):
+                pass
+        self._build()
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({
+                "signature": signature,
+                "by_year": self.by_year,
+                "by_id": self.by_id,
+                "by_actor": self.by_actor,
+            }),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.index_path)
+
+    def _build(self) -> None:
+        with open(self.path, "rb") as fh:
+            header = fh.readline()
+            offset = len(header)
+            for line in fh:
+                row = next(csv.reader([line.decode("utf-8")]))
+                movie_id, year, actors = row[0], row[2], row[6]
+                self.by_id[movie_id] = offset
+                self.by_year.setdefault(year, []).append(offset)
+                for entry in actors.split("|") if actors else ():
+                    self.by_actor.setdefault(entry.partition(":")[0], []).append(offset)
+                offset += len(line)
+        logger.info("Indexed %s rows of %s", len(self.by_id), self.path.name)
+
+    def offsets(self, kind: str, key: str) -> List[int]:
+        if kind == "id":
+            return [self.by_id[key]] if key in self.by_id else []
+        return (self.by_year if kind == "year" else self.by_actor).get(key, [])
+
+    def read(self, offsets: List[int], registry: Optional[ActorRegistry] = None) -> Iterator[Movie]:
+        """Movies stored at `offsets`, read through a memory map."""
+        if not offsets:
+            return
+        with open(self.path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in offsets:
+                end = mm.find(b"\n", offset)
+                line = mm[offset:end if end != -1 else len(mm)]
+                yield movie_from_row(next(csv.reader([line.decode("utf-8")])), registry)
@@ -0,0 +1,141 @@
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from models.movie_model import Movie
+from .base_persistence import BasePersistence
+from utils import metrics
+
+import logging
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+@dataclass
+class SinkResult:
+    name: str
+    written: int = 0
+    received: int = 0
+    error: Optional[BaseException] = None
+    detached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Sink:
+    def __init__(self, name: str, persistence: BasePersistence, queue_size: int):
+        self.name = name
+        self.persistence = persistence
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.result = SinkResult(name)
+        self.stop = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.result.error is None and not self.stop.is_set()
+
+    def _drain(self) -> Iterator[Movie]:
+        while not self.stop.is_set():
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is _END:
+                return
+            self.result.received += 1
+            yield item
+
+    def run(self, batch_size: int) -> None:
+        try:
+            self.result.written = self.persistence.save_stream(self._drain(), batch_size=batch_size)
+        except BaseException as exc:
+            self.result.error = exc
+            logger.error("Sink '%s' failed: %s", self.name, exc, exc_info=True)
+
+
+class FanOutDispatcher:
+    """
+    Feed one Movie stream to several BasePersistence sinks concurrently.
+
+    Every sink runs its own save_stream on a thread, fed through a bounded
+    queue, so memory is capped at queue_size movies per sink and the sinks
+    write while the scraper is still fetching. A full queue blocks the
+    producer (backpressure); if a sink stays full for stall_timeout seconds
+    it is detached so the remaining sinks keep going (stall_timeout=0 waits
+    forever). A failed sink is dropped and reported, unless fail_fast is set,
+    in which case the whole run is aborted.
+    """
+
+    def __init__(
+        self,
+        sinks: Dict[str, BasePersistence],
+        queue_size: Optional[int] = None,
+        stall_timeout: Optional[float] = None,
+        fail_fast: Optional[bool] = None,
+    ):
+        self.queue_size = queue_size or int(os.getenv("FANOUT_QUEUE_SIZE", 1_000))
+        self.stall_timeout = (
+            stall_timeout if stall_timeout is not None
+            else float(os.getenv("FANOUT_STALL_TIMEOUT", 300))
+        )
+        self.fail_fast = (
+            fail_fast if fail_fast is not None
+            else os.getenv("FANOUT_FAIL_FAST", "false").lower() == "true"
+        )
+        self._sinks = [_Sink(name, sink, self.queue_size) for name, sink in sinks.items()]
+
+    def _put(self, sink: _Sink, item) -> None:
+        """Hand an item to a sink, detaching it if it stays full past stall_timeout."""
+        deadline = time.monotonic() + self.stall_timeout if self.stall_timeout else None
+        while sink.alive:
+            try:
+                sink.queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    logger.error("Sink '%s' stalled for %ss; detaching it", sink.name, self.stall_timeout)
+                    sink.result.detached = True
+                    sink.result.error = TimeoutError(f"sink queue full for {self.stall_timeout}s")
+                    sink.stop.set()
+
+    def run(self, movies: Iterator[Movie], batch_size: int = 1_000) -> Dict[str, SinkResult]:
+        for sink in self._sinks:
+            sink.thread = threading.Thread(
+                target=sink.run, args=(batch_size,), name=f"sink-{sink.name}", daemon=True
+            )
+            sink.thread.start()
+            metrics.QUEUE_DEPTH.set_function(sink.queue.qsize, f"sink_{sink.name}")
+
+        aborted: Optional[BaseException] = None
+        try:
+            for movie in movies:
+                live = [sink for sink in self._sinks if sink.alive]
+                if self.fail_fast and len(live) < len(self._sinks):
+                    failed = next(s for s in self._sinks if not s.alive)
+                    aborted = RuntimeError(f"Sink '{failed.name}' failed: {failed.result.error}")
+                    break
+                if not live:
+                    aborted = RuntimeError("All sinks failed")
+                    break
+                for sink in live:
+                    self._put(sink, movie)
+        finally:
+            for sink in self._sinks:
+                if aborted is not None and self.fail_fast:
+                    sink.stop.set()
+                self._put(sink, _END)
+            for sink in self._sinks:
+                # a detached sink may be hung inside its backend; don't wait on it forever
+                sink.thread.join(timeout=self.stall_timeout or None if sink.result.detached else None)
+                metrics.QUEUE_DEPTH.remove(f"sink_{sink.name}")
+
+        if aborted is not None and self.fail_fast:
+            raise aborted
+        return {sink.name: sink.result for sink in self._sinks}
@@ -0,0 +1,171 @@
+import os
+import time
+import uuid
+from pathlib import Path
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from models.movie_model import Movie
+from .base_persistence import BasePersistence
+from utils import metrics
+
+try:  # optional dependency, only needed for this backend
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on the environment
+    pa = pq = None
+
+
+def _movie_schema():
+    return pa.schema([
+        ("movie_id", pa.string()),
+        ("title", pa.string()),
+        ("year", pa.int16()),
+        ("rating", pa.float32()),
+        ("duration", pa.int32()),
+        ("metascore", pa.int16()),
+    ])
+
+
+def _actor_schema():
+    # one row per (movie, cast member); ids and names repeat across films
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("movie_id", dictionary),
+        ("billing_order", pa.int16()),
+        ("actor_id", dictionary),
+        ("name", dictionary),
+    ])
+
+
+class ParquetHandler(BasePersistence):
+    """
+    Stream movies to compressed Parquet, one row group per batch.
+
+    Movies and actors go to separate tables, partitioned by scrape date:
+        <output_dir>/movies/scrape_date=YYYY-MM-DD/part-HHMMSS-<pid>-<uid>.parquet
+        <output_dir>/actors/scrape_date=YYYY-MM-DD/part-HHMMSS-<pid>-<uid>.parquet
+    Every save_stream call writes a new part; the pid and a random uid keep
+    runs and workers that start in the same second from colliding. A worker
+    calls save_stream once per claimed batch, so on close the parts written
+    by this handler are compacted into one per partition. A part is complete
+    once save_stream returns and compaction only replaces parts after the
+    merged one is in place, so a crash can leave extra parts or duplicate
+    rows but never loses a settled batch.
+    Actor ids and names are dictionary-encoded instead of being joined into
+    one "id:name|id:name" string per movie as in the CSV export.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None) -> None:
+        if pa is None:
+            raise ImportError("The parquet backend requires pyarrow: pip install pyarrow")
+
+        self.output_dir = Path(output_dir or os.getenv("PARQUET_OUTPUT_DIR", "data/parquet"))
+        self.compression = os.getenv("PARQUET_COMPRESSION", "zstd")
+        self.movies_path: Optional[Path] = None
+        self.actors_path: Optional[Path] = None
+        self._parts: List[Tuple[Path, Path]] = []
+
+    @staticmethod
+    def _part_name(started: datetime) -> str:
+        return f"part-{started:%H%M%S}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+
+    def _new_part(self) -> None:
+        started = datetime.now()
+        partition = f"scrape_date={started:%Y-%m-%d}"
+        part = self._part_name(started)
+        self.movies_path = self.output_dir / "movies" / partition / part
+        self.actors_path = self.output_dir / "actors" / partition / part
+
+    # ------------------------------------------------------------------
+    # streaming save
+    # ------------------------------------------------------------------
+    def save_stream(self, movies: Iterator[Movie], batch_size: int = 1_000) -> int:
+        """
+        Persist an iterator of Movie objects to Parquet.
+        Returns the total number of movies written.
+        """
+        self._new_part()
+        self.movies_path.parent.mkdir(parents=True, exist_ok=True)
+        self.actors_path.parent.mkdir(parents=True, exist_ok=True)
+        written = 0
+
+        with pq.ParquetWriter(self.movies_path, _movie_schema(), compression=self.compression) as movie_writer, \
+                pq.ParquetWriter(self.actors_path, _actor_schema(), compression=self.compression) as actor_writer:
+            buf: list[Movie] = []
+            for movie in movies:
+                buf.append(movie)
+                if len(buf) >= batch_size:
+                    self._write_batch(movie_writer, actor_writer, buf)
+                    written += len(buf)
+                    buf.clear()
+
+            if buf:  # tail
+                self._write_batch(movie_writer, actor_writer, buf)
+                written += len(buf)
+
+        self._parts.append((self.movies_path, self.actors_path))
+        return written
+
+    def _write_batch(self, movie_writer, actor_writer, buf: list[Movie]) -> None:
+        started = time.perf_counter()
+        movies = pa.Table.from_pydict(
+            {
+                "movie_id": [m.movie_id for m in buf],
+                "title": [m.title for m in buf],
+                "year": [m.year for m in buf],
+                "rating": [m.rating for m in buf],
+                "duration": [m.duration for m in buf],
+                "metascore": [m.metascore for m in buf],
+            },
+            schema=_movie_schema(),
+        )
+        movie_writer.write_table(movies, row_group_size=len(buf))
+        metrics.FLUSH_ROWS.observe(len(buf), "parquet")
+
+        cast = [(m.movie_id, order, a.actor_id, a.name)
+                for m in buf for order, a in enumerate(m.actors, start=1)]
+        if not cast:
+            metrics.FLUSH_SECONDS.observe(time.perf_counter() - started, "parquet", "row_group")
+            return
+        movie_ids, orders, actor_ids, names = zip(*cast)
+        actors = pa.Table.from_arrays(
+            [
+                pa.array(movie_ids).dictionary_encode(),
+                pa.array(orders, type=pa.int16()),
+                pa.array(actor_ids).dictionary_encode(),
+                pa.array(names).dictionary_encode(),
+            ],
+            schema=_actor_schema(),
+        )
+        actor_writer.write_table(actors, row_group_size=len(cast))
+        metrics.FLUSH_SECONDS.observe(time.perf_counter() - started, "parquet", "row_group")
+
+    # ------------------------------------------------------------------
+    # compaction
+    # ------------------------------------------------------------------
+    def _compact(self) -> None:
+        """Merge the parts this handler wrote into one part per scrape_date partition."""
+        by_partition: dict[Path, List[Tuple[Path, Path]]] = {}
+        for movies_path, actors_path in self._parts:
+            by_partition.setdefault(movies_path.parent, []).append((movies_path, actors_path))
+
+        for parts in by_partition.values():
+            if len(parts) < 2:
+                continue
+            name = self._part_name(datetime.now())
+            for sources, schema in (([m for m, _ in parts], _movie_schema()), ([a for _, a in parts], _actor_schema())):
+                target = sources[0].with_name(name)
+                staging = target.with_name(f"_{name}.tmp")  # skipped by dataset readers until renamed
+                with pq.ParquetWriter(staging, schema, compression=self.compression) as writer:
+                    for source in sources:
+                        table = pq.read_table(source, schema=schema)
+                        if table.num_rows:
+                            writer.write_table(table, row_group_size=table.num_rows)
+                os.replace(staging, target)
+                for source in sources:
+                    source.unlink(missing_ok=True)
+        self._parts.clear()
+
+    def close(self) -> None:
+        self._compact()
@@ -0,0 +1,173 @@
+import os
+from typing import Callable, Iterable, Optional
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# bump when any definition below changes; stale objects are dropped and rebuilt
+ANALYTICS_VERSION = 1
+
+# serializes refreshes across processes loading the same database
+_REFRESH_LOCK_KEY = 0x494D4442  # "IMDB"
+
+
+class PgAnalytics:
+    """
+    Precomputed versions of the queries.sql analytics, kept next to the data.
+
+      - decade_longest       top-N longest films per decade (summary table)
+      - year_rating_stats    movie count, mean and stddev of ratings per year
+                             (summary table)
+      - rating_divergence    IMDb vs Metascore gap above 20 % (materialized
+                             view with a unique index)
+
+    The summary tables are rebuilt only for the years/decades a load touched,
+    inside one transaction, so readers see either the old or the new rows and
+    never a half-written refresh. The materialized view is refreshed
+    CONCURRENTLY, which keeps it readable while it is recomputed.
+    """
+
+    def __init__(self, connection: Callable, top_n: Optional[int] = None) -> None:
+        self.connection = connection
+        self.top_n = top_n or int(os.getenv("PG_ANALYTICS_TOP_N", 5))
+
+    # ------------------------------------------------------------------
+    # schema
+    # ------------------------------------------------------------------
+    def ensure_schema(self) -> None:
+        """Create the analytics objects, rebuilding them if their version is stale."""
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (_REFRESH_LOCK_KEY,))
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS analytics_version (
+                    component   TEXT PRIMARY KEY,
+                    version     INTEGER NOT NULL,
+                    applied_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            cur.execute("SELECT version FROM analytics_version WHERE component = 'analytics'")
+            row = cur.fetchone()
+            if row and row[0] == ANALYTICS_VERSION:
+                conn.commit()
+                return
+
+            logger.info("Building analytics schema v%s (was %s)", ANALYTICS_VERSION, row[0] if row else 'none')
+            cur.execute("DROP MATERIALIZED VIEW IF EXISTS rating_divergence")
+            cur.execute("DROP TABLE IF EXISTS decade_longest, year_rating_stats")
+            cur.execute(
+                """
+                CREATE TABLE decade_longest (
+                    decade_start  INTEGER  NOT NULL,
+                    rn            SMALLINT NOT NULL,
+                    movie_id      TEXT     NOT NULL,
+                    title         VARCHAR(255) NOT NULL,
+                    duration      INTEGER,
+                    PRIMARY KEY (decade_start, rn)
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE year_rating_stats (
+                    year           INTEGER PRIMARY KEY,
+                    movies         INTEGER NOT NULL,
+                    avg_rating     NUMERIC(4,2),
+                    stddev_rating  NUMERIC(4,2)
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE MATERIALIZED VIEW rating_divergence AS
+                SELECT movie_id,
+                       title,
+                       year,
+                       rating,
+                       metascore,
+                       ABS(rating - metascore) / GREATEST(rating, metascore) * 100 AS diff_pct
+                FROM   movies
+                WHERE  ABS(rating - metascore) / GREATEST(rating, metascore) > 0.2
+                """
+            )
+            # unique index is what allows REFRESH ... CONCURRENTLY
+            cur.execute("CREATE UNIQUE INDEX idx_rating_divergence_id ON rating_divergence(movie_id)")
+            cur.execute("CREATE INDEX idx_rating_divergence_diff ON rating_divergence(diff_pct DESC)")
+
+            self._refresh_years(cur, None)
+            cur.execute(
+                """
+                INSERT INTO analytics_version (component, version)
+                VALUES ('analytics', %s)
+                ON CONFLICT (component) DO UPDATE
+                SET    version = EXCLUDED.version, applied_at = CURRENT_TIMESTAMP
+                """,
+                (ANALYTICS_VERSION,),
+            )
+            conn.commit()
+
+    # ------------------------------------------------------------------
+    # refresh
+    # ------------------------------------------------------------------
+    def refresh(self, years: Optional[Iterable[int]] = None) -> None:
+        """
+        Bring every analytics object up to date. `years` limits the summary
+        tables to the partitions a load touched; None rebuilds them fully.
+        """
+        years = sorted(set(years)) if years is not None else None
+        if years == []:
+            return
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (_REFRESH_LOCK_KEY,))
+            self._refresh_years(cur, years)
+            conn.commit()
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY rating_divergence")
+            conn.commit()
+        logger.info("Analytics refreshed (%s)", "all years" if years is None else f"{len(years)} years")
+
+    def _refresh_years(self, cur, years: Optional[list]) -> None:
+        if years is None:
+            cur.execute("DELETE FROM year_rating_stats")
+            cur.execute("DELETE FROM decade_longest")
+            year_filter, decade_filter, params, decade_params = "", "", (), ()
+        else:
+            decades = sorted({year // 10 * 10 for year in years})
+            cur.execute("DELETE FROM year_rating_stats WHERE year = ANY(%s)", (years,))
+            cur.execute("DELETE FROM decade_longest WHERE decade_start = ANY(%s)", (decades,))
+            year_filter, params = "WHERE year = ANY(%s)", (years,)
+            decade_filter, decade_params = "WHERE (year / 10) * 10 = ANY(%s)", (decades,)
+
+        cur.execute(
+            f"""
+            INSERT INTO year_rating_stats (year, movies, avg_rating, stddev_rating)
+            SELECT year,
+                   COUNT(*),
+                   AVG(rating)::NUMERIC(4,2),
+                   STDDEV_POP(rating)::NUMERIC(4,2)
+            FROM   movies
+            {year_filter}
+            GROUP  BY year
+            """,
+            params,
+        )
+        cur.execute(
+            f"""
+            INSERT INTO decade_longest (decade_start, rn, movie_id, title, duration)
+            SELECT decade_start, rn, movie_id, title, duration
+            FROM (
+                SELECT (year / 10) * 10 AS decade_start,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY (year / 10) * 10
+                           ORDER BY duration DESC NULLS LAST, movie_id
+                       ) AS rn,
+                       movie_id, title, duration
+                FROM   movies
+                {decade_filter}
+            ) ranked
+            WHERE  rn <= %s
+            """,
+            decade_params + (self.top_n,),
+        )
@@ -0,0 +1,337 @@
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+
+from models.movie_model import Movie
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class PgWorkQueue:
+    """
+    Postgres-backed queue of chart titles for the coordinator / worker mode.
+
+    The coordinator loads the chart edges of a run (WORK_QUEUE_RUN) into
+    `scrape_queue`. Workers claim WORK_QUEUE_BATCH rows at a time with
+    FOR UPDATE SKIP LOCKED, so any number of them can pull from the same run
+    without handing out a title twice. A claim is a lease of
+    WORK_QUEUE_LEASE seconds that a background heartbeat keeps extending
+    while the worker is alive; rows whose lease ran out (the worker died or
+    lost the database) are claimed again by the next worker, up to
+    WORK_QUEUE_MAX_ATTEMPTS times.
+
+    A worker settles each claimed batch once its sinks finished writing it:
+    titles the sinks stored are done, the rest go back to pending, so a
+    crash anywhere before that means the batch is scraped again
+    (at-least-once).
+    """
+
+    def __init__(self, run_id: Optional[str] = None, worker_id: Optional[str] = None) -> None:
+        self.run_id = run_id or os.getenv("WORK_QUEUE_RUN", "top250")
+        self.worker_id = worker_id or os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = max(1, int(os.getenv("WORK_QUEUE_BATCH", 50)))
+        self.lease = float(os.getenv("WORK_QUEUE_LEASE", 120))
+        self.heartbeat_interval = float(os.getenv("WORK_QUEUE_HEARTBEAT", 15))
+        self.max_attempts = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", 3))
+        self.poll_interval = float(os.getenv("WORK_QUEUE_POLL", 5))
+
+        self.pool = ThreadedConnectionPool(
+            1,
+            3,
+            dbname=os.getenv("POSTGRES_DB", "imdb_db"),
+            user=os.getenv("POSTGRES_USER", "postgres"),
+            password=os.getenv("POSTGRES_PASSWORD", "postgres"),
+            host=os.getenv("POSTGRES_HOST", "localhost"),
+            port=os.getenv("POSTGRES_PORT", "5432"),
+        )
+        self._handed: List[str] = []
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+        self._initialize_schema()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection; rolled back on error, always returned."""
+        conn = self.pool.getconn()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    def _initialize_schema(self) -> None:
+        with self.connection() as conn, conn.cursor() as cur:
+            # status: pending -> leased -> done | failed
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scrape_queue (
+                    run_id       TEXT        NOT NULL,
+                    movie_id     TEXT        NOT NULL,
+                    position     INTEGER     NOT NULL,
+                    edge         JSONB       NOT NULL,
+                    status       TEXT        NOT NULL DEFAULT 'pending',
+                    worker_id    TEXT,
+                    lease_until  TIMESTAMPTZ,
+                    attempts     SMALLINT    NOT NULL DEFAULT 0,
+                    updated_at   TIMESTAMPTZ DEFAULT now(),
+                    PRIMARY KEY (run_id, movie_id)
+                )
+                """
+            )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_scrape_queue_open ON scrape_queue(run_id, position) "
+                "WHERE status IN ('pending', 'leased')"
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scrape_workers (
+                    worker_id     TEXT PRIMARY KEY,
+                    run_id        TEXT NOT NULL,
+                    started_at    TIMESTAMPTZ DEFAULT now(),
+                    heartbeat_at  TIMESTAMPTZ DEFAULT now()
+                )
+                """
+            )
+            conn.commit()
+
+    # ------------------------------------------------------------------
+    # coordinator
+    # ------------------------------------------------------------------
+    def enqueue(self, edges: Iterable[Dict]) -> int:
+        """(Re)load the run with `edges`; titles already in it start over as pending."""
+        unique: Dict[str, Dict] = {}
+        for edge in edges:
+            unique.setdefault(edge["node"]["id"], edge)
+        rows = [
+            (self.run_id, movie_id, position, json.dumps(edge))
+            for position, (movie_id, edge) in enumerate(unique.items())
+        ]
+        with self.connection() as conn, conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                INSERT INTO scrape_queue (run_id, movie_id, position, edge)
+                VALUES %s
+                ON CONFLICT (run_id, movie_id) DO UPDATE
+                SET    position = EXCLUDED.position,
+                       edge = EXCLUDED.edge,
+                       status = 'pending',
+                       worker_id = NULL,
+                       lease_until = NULL,
+                       attempts = 0,
+                       updated_at = now()
+                """,
+                rows,
+                page_size=1_000,
+            )
+            conn.commit()
+        logger.info("Queued %s titles for run '%s'", len(rows), self.run_id)
+        return len(rows)
+
+    def progress(self) -> Dict[str, int]:
+        """Row count per status for this run."""
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT status, COUNT(*) FROM scrape_queue WHERE run_id = %s GROUP BY status",
+                (self.run_id,),
+            )
+            counts = dict(cur.fetchall())
+            conn.commit()
+        return counts
+
+    def wait_until_drained(self) -> Dict[str, int]:
+        """Block until every title of the run is done or failed, logging progress."""
+        while True:
+            counts = self.progress()
+            open_rows = counts.get("pending", 0) + counts.get("leased", 0)
+            logger.info(
+                "Run '%s': %s pending, %s leased, %s done, %s failed",
+                self.run_id, counts.get("pending", 0), counts.get("leased", 0),
+                counts.get("done", 0), counts.get("failed", 0),
+            )
+            if not open_rows:
+                return counts
+            time.sleep(self.poll_interval)
+
+    # ------------------------------------------------------------------
+    # worker
+    # ------------------------------------------------------------------
+    def claim(self) -> List[Dict]:
+        """
+        Lease the next batch of pending titles, together with titles whose
+        lease expired; rows that used up their attempts are marked failed.
+        """
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE scrape_queue
+                SET    status = 'failed', worker_id = NULL, lease_until = NULL, updated_at = now()
+                WHERE  run_id = %s AND status = 'leased' AND lease_until < now() AND attempts >= %s
+                """,
+                (self.run_id, self.max_attempts),
+            )
+            cur.execute(
+                """
+                WITH next AS (
+                    SELECT movie_id
+                    FROM   scrape_queue
+                    WHERE  run_id = %s
+                      AND  (status = 'pending' OR (status = 'leased' AND lease_until < now()))
+                    ORDER  BY position
+                    LIMIT  %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE scrape_queue q
+                SET    status = 'leased',
+                       worker_id = %s,
+                       lease_until = now() + make_interval(secs => %s),
+                       attempts = q.attempts + 1,
+                       updated_at = now()
+                FROM   next
+                WHERE  q.run_id = %s AND q.movie_id = next.movie_id
+                RETURNING q.position, q.edge
+                """,
+                (self.run_id, self.batch_size, self.worker_id, self.lease, self.run_id),
+            )
+            rows = sorted(cur.fetchall(), key=lambda row: row[0])
+            conn.commit()
+        return [edge for _, edge in rows]
+
+    def _open_elsewhere(self) -> int:
+        """Titles still pending or leased by other workers."""
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT COUNT(*) FROM scrape_queue
+                WHERE  run_id = %s
+                  AND  (status = 'pending' OR (status = 'leased' AND worker_id IS DISTINCT FROM %s))
+                """,
+                (self.run_id, self.worker_id),
+            )
+            count = cur.fetchone()[0]
+            conn.commit()
+        return count
+
+    def claimed_batches(self) -> Iterator[List[Dict]]:
+        """
+        Chart edges for this worker, one claimed batch at a time. The caller
+        settles every batch (see settle) before asking for the next one, so
+        a worker that waits for others holds no leases itself. Ends once
+        nothing is pending and no other worker holds a lease that could
+        still expire or be released.
+        """
+        self._start_heartbeat()
+        while True:
+            edges = self.claim()
+            if edges:
+                logger.info("Worker %s claimed %s titles", self.worker_id, len(edges))
+                yield edges
+                continue
+            if not self._open_elsewhere():
+                return
+            time.sleep(self.poll_interval)
+
+    def track(self, movies: Iterator[Movie]) -> Iterator[Movie]:
+        """Pass movies through, remembering which titles reached the sinks."""
+        for movie in movies:
+            self._handed.append(movie.movie_id)
+            yield movie
+
+    def settle(self, success: bool, done: Iterable[str] = ()) -> None:
+        """
+        Settle the titles this worker holds. When the sinks succeeded, the
+        titles handed to them and those in `done` (e.g. unchanged titles an
+        incremental run skipped) are done. Every other held title (fetch or
+        parse failures, or everything after a sink failure) goes back to
+        pending until it runs out of attempts.
+        """
+        finished = list(self._handed) + list(done) if success else []
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE scrape_queue
+                SET    status = 'done', worker_id = NULL, lease_until = NULL, updated_at = now()
+                WHERE  run_id = %s AND worker_id = %s AND status = 'leased' AND movie_id = ANY(%s)
+                """,
+                (self.run_id, self.worker_id, finished),
+            )
+            completed = cur.rowcount
+            cur.execute(
+                """
+                UPDATE scrape_queue
+                SET    status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+                       worker_id = NULL,
+                       lease_until = NULL,
+                       updated_at = now()
+                WHERE  run_id = %s AND worker_id = %s AND status = 'leased'
+                """,
+                (self.max_attempts, self.run_id, self.worker_id),
+            )
+            released = cur.rowcount
+            conn.commit()
+        self._handed = []
+        logger.info("Worker %s: %s titles done, %s released", self.worker_id, completed, released)
+
+    def finish(self, success: bool) -> None:
+        """Settle whatever this worker still holds and deregister it."""
+        self._stop_heartbeat()
+        self.settle(success)
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM scrape_workers WHERE worker_id = %s", (self.worker_id,))
+            conn.commit()
+
+    def _start_heartbeat(self) -> None:
+        if self._heartbeat is not None:
+            return
+        self._beat()
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="work-queue-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _stop_heartbeat(self) -> None:
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join(timeout=self.heartbeat_interval + 5)
+            self._heartbeat = None
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self._beat()
+            except Exception as e:  # a missed beat only shortens the lease
+                logger.warning("Heartbeat of worker %s failed: %s", self.worker_id, e)
+
+    def _beat(self) -> None:
+        """Record liveness and push this worker's leases forward."""
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO scrape_workers (worker_id, run_id) VALUES (%s, %s)
+                ON CONFLICT (worker_id) DO UPDATE SET heartbeat_at = now(), run_id = EXCLUDED.run_id
+                """,
+                (self.worker_id, self.run_id),
+            )
+            cur.execute(
+                """
+                UPDATE scrape_queue
+                SET    lease_until = now() + make_interval(secs => %s)
+                WHERE  run_id = %s AND worker_id = %s AND status = 'leased'
+                """,
+                (self.lease, self.run_id, self.worker_id),
+            )
+            conn.commit()
+
+    def close(self) -> None:
+        self._stop_heartbeat()
+        if not self.pool.closed:
+            self.pool.closeall()
@@ -1,33 +1,114 @@
+import io
 import os
+import csv
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import errors
+from psycopg2.pool import ThreadedConnectionPool
 from psycopg2.extras import execute_batch
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-from typing import Iterator
+from typing import Iterator, Optional
 
-from models.movie_model import Movie, Actor
+from models.movie_model import Movie
+from models.actor_registry import ActorRegistry
 from .base_persistence import BasePersistence
+from .pg_analytics import PgAnalytics
+from utils import metrics
 
 import logging
 logger = logging.getLogger(__name__)
 
 
+_SCHEMA_LOCK_KEY = 0x494D4453  # "IMDS"
+
+MOVIE_COLUMNS = ("movie_id", "title", "year", "rating", "duration", "metascore")
+CAST_COLUMNS = ("movie_id", "billing_order", "actor_id", "name")
+
+
 class PostgresHandler(BasePersistence):
     """
     Streaming-only persistence that auto-creates the DB if missing
-    and uses the IMDb ID as the primary key.
+    and uses the IMDb ID as the primary key. Cast members are stored once in
+    `people` and linked to titles through `movie_cast` with their billing
+    order (1 = lead).
+
+    Batches are loaded with COPY into per-session staging tables and merged
+    into the target tables with one set-based upsert (PG_LOAD_METHOD=copy,
+    default); PG_LOAD_METHOD=batch uses execute_batch INSERTs instead.
+
+    Connections come from a pool of PG_POOL_SIZE; callers wait for a free
+    one rather than failing when the pool is exhausted. With
+    PG_FLUSH_WORKERS > 1 batches are flushed in parallel, each on its own
+    pooled connection and committed independently; a batch that shares a
+    movie_id with one still in flight waits for it, so the later row wins.
+
+    get_movies_by_year / get_movie / get_movies_by_actor page through
+    indexed queries with keyset pagination (PG_QUERY_PAGE_SIZE rows per
+    page).
+
+    After each stream the analytics tables (see PgAnalytics) are refreshed
+    for the years the stream touched; PG_ANALYTICS_ENABLED=false skips it.
     """
 
     def __init__(self) -> None:
+        self.load_method = os.getenv("PG_LOAD_METHOD", "copy").lower()
+        self.flush_workers = max(1, int(os.getenv("PG_FLUSH_WORKERS", 2)))
+        pool_size = max(self.flush_workers, int(os.getenv("PG_POOL_SIZE", 4)))
+        self.query_page_size = max(1, int(os.getenv("PG_QUERY_PAGE_SIZE", 500)))
+
         self._ensure_database_exists()
-        self.conn = psycopg2.connect(
+        self.pool = ThreadedConnectionPool(
+            1,
+            pool_size,
             dbname=os.getenv("POSTGRES_DB", "imdb_db"),
             user=os.getenv("POSTGRES_USER", "postgres"),
             password=os.getenv("POSTGRES_PASSWORD", "postgres"),
             host=os.getenv("POSTGRES_HOST", "localhost"),
             port=os.getenv("POSTGRES_PORT", "5432"),
         )
+        self._executor = (
+            ThreadPoolExecutor(max_workers=self.flush_workers, thread_name_prefix="pg-flush")
+            if self.flush_workers > 1 else None
+        )
+        # batches held in memory while waiting for a flush worker
+        self.max_in_flight = self.flush_workers * 2
+        # getconn() raises PoolError instead of blocking when every connection is out
+        self._free_connections = threading.BoundedSemaphore(pool_size)
+        self._load_method_lock = threading.Lock()
         self._initialize_schema()
 
+        self.analytics = (
+            PgAnalytics(self.connection)
+            if os.getenv("PG_ANALYTICS_ENABLED", "true").lower() == "true" else None
+        )
+        self._touched_years: set[int] = set()
+        self._touched_lock = threading.Lock()
+        if self.analytics is not None:
+            self.analytics.ensure_schema()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection, waiting for one if all are in use; closed on error, always returned."""
+        self._free_connections.acquire()
+        try:
+            conn = self.pool.getconn()
+        except BaseException:
+            self._free_connections.release()
+            raise
+        failed = False
+        try:
+            yield conn
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # a connection that saw an error may be unusable; the pool opens a fresh one
+            self.pool.putconn(conn, close=failed)
+            self._free_connections.release()
+
     def _ensure_database_exists(self) -> None:
         """Create the target DB if it does not yet exist."""
         conn = psycopg2.connect(
@@ -47,7 +128,9 @@ class PostgresHandler(BasePersistence):
         conn.close()
 
     def _initialize_schema(self) -> None:
-        with self.conn.cursor() as cur:
+        with self.connection() as conn, conn.cursor() as cur:
+            # concurrent workers starting up must not run the migrations below twice
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (_SCHEMA_LOCK_KEY,))
             cur.execute(
                 """
                 CREATE TABLE IF NOT EXISTS movies (
@@ -57,44 +140,305 @@ class PostgresHandler(BasePersistence):
                     rating     NUMERIC(3,1) NOT NULL,
                     duration   INTEGER,
                     metascore  NUMERIC(4,1),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            cur.execute(
+                "ALTER TABLE movies ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP"
+            )
+            self._migrate_timestamps(cur)
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS people (
+                    actor_id  TEXT PRIMARY KEY,
+                    name      VARCHAR(255) NOT NULL
                 )
                 """
             )
+            # billing_order is the 1-based position in the title's cast.edges
             cur.execute(
                 """
-                CREATE TABLE IF NOT EXISTS actors (
-                    movie_id  TEXT REFERENCES movies(movie_id) ON DELETE CASCADE,
-                    actor_id  TEXT NOT NULL,
-                    name      VARCHAR(255) NOT NULL,
+                CREATE TABLE IF NOT EXISTS movie_cast (
+                    movie_id       TEXT REFERENCES movies(movie_id) ON DELETE CASCADE,
+                    actor_id       TEXT NOT NULL REFERENCES people(actor_id),
+                    billing_order  SMALLINT NOT NULL,
                     PRIMARY KEY (movie_id, actor_id)
                 )
                 """
             )
-        self.conn.commit()
+            self._migrate_actors(cur)
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_movie_cast_lead ON movie_cast(movie_id) WHERE billing_order = 1"
+            )
+            # (actor_id, movie_id) serves actor lookups in movie_id order for keyset paging
+            cur.execute("DROP INDEX IF EXISTS idx_movie_cast_actor")
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_movie_cast_actor_movie ON movie_cast(actor_id, movie_id)"
+            )
+            # (year, movie_id) serves year lookups in keyset order; replaces the year-only index
+            cur.execute("DROP INDEX IF EXISTS idx_movies_year")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_movies_year_movie ON movies(year, movie_id)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_people_name ON people(name)")
+            conn.commit()
+
+    @staticmethod
+    def _migrate_timestamps(cur) -> None:
+        """
+        Older databases have created_at / updated_at as timestamp without
+        time zone, holding the server's local time; epoch math on those is
+        off by the UTC offset. Convert them once to timestamptz, reading the
+        old values in the session's TimeZone, the zone they were written in.
+        """
+        cur.execute(
+            """
+            SELECT column_name FROM information_schema.columns
+            WHERE  table_name = 'movies' AND table_schema = current_schema()
+              AND  column_name IN ('created_at', 'updated_at')
+              AND  data_type = 'timestamp without time zone'
+            """
+        )
+        for (column,) in cur.fetchall():
+            cur.execute(
+                f"ALTER TABLE movies ALTER COLUMN {column} TYPE TIMESTAMPTZ "
+                f"USING {column} AT TIME ZONE current_setting('TimeZone')"
+            )
+            logger.info("Converted movies.%s to timestamptz", column)
+
+    @staticmethod
+    def _migrate_actors(cur) -> None:
+        """
+        One-time move of the original per-title `actors` table into people /
+        movie_cast; the old table is kept as actors_migrated.
+        """
+        cur.execute("SELECT to_regclass('actors')")
+        if cur.fetchone()[0] is None:
+            return
+        cur.execute(
+            """
+            INSERT INTO people (actor_id, name)
+            SELECT DISTINCT ON (actor_id) actor_id, name
+            FROM   actors
+            ORDER  BY actor_id
+            ON CONFLICT (actor_id) DO NOTHING
+            """
+        )
+        # actors kept no billing; rows were inserted in cast order, so physical order is the best guess
+        cur.execute(
+            """
+            INSERT INTO movie_cast (movie_id, actor_id, billing_order)
+            SELECT movie_id, actor_id, ROW_NUMBER() OVER (PARTITION BY movie_id ORDER BY ctid)
+            FROM   actors
+            ON CONFLICT (movie_id, actor_id) DO NOTHING
+            """
+        )
+        migrated = cur.rowcount
+        cur.execute("ALTER TABLE actors RENAME TO actors_migrated")
+        logger.info("Migrated %s cast rows from actors into people / movie_cast", migrated)
 
     def save_stream(self, movies: Iterator[Movie], batch_size: int = 1_000) -> int:
-        cur = self.conn.cursor()
         buf: list[Movie] = []
+        # flushes still running, with the titles in them; bounds batches held in memory
+        in_flight: dict[Future, set[str]] = {}
         saved = 0
 
+        def reap(done) -> None:
+            for future in done:
+                in_flight.pop(future, None)
+                future.result()  # surfaces a failed flush
+
+        def submit(batch: list[Movie]) -> None:
+            if self._executor is None:
+                self._flush_batch(batch)
+                return
+            reap([f for f in in_flight if f.done()])
+            # a title in two batches must commit in stream order
+            ids = {m.movie_id for m in batch}
+            overlapping = [f for f, flushing in in_flight.items() if ids & flushing]
+            if overlapping:
+                reap(wait(overlapping).done)
+            while len(in_flight) >= self.max_in_flight:
+                reap(wait(in_flight, return_when=FIRST_COMPLETED).done)
+            in_flight[self._executor.submit(self._flush_batch, batch)] = ids
+
         try:
             for movie in movies:
                 buf.append(movie)
                 if len(buf) >= batch_size:
-                    self._flush_batch(cur, buf)
+                    submit(buf)
                     saved += len(buf)
-                    buf.clear()
+                    buf = []
 
             if buf:
-                self._flush_batch(cur, buf)
+                submit(buf)
                 saved += len(buf)
-
-            return saved
         finally:
-            cur.close()
+            # wait for every batch of this stream, surfacing the first failure
+            reap(list(wait(in_flight).done))
+
+        self._refresh_analytics()
+        return saved
+
+    def _refresh_analytics(self) -> None:
+        if self.analytics is None:
+            return
+        with self._touched_lock:
+            years, self._touched_years = self._touched_years, set()
+        try:
+            self.analytics.refresh(years)
+        except psycopg2.Error as e:
+            # the load itself is committed; dashboards just lag until the next refresh
+            logger.error("Analytics refresh failed: %s", e, exc_info=True)
+
+    def _flush_batch(self, buf: list[Movie]) -> None:
+        """Write one batch on its own pooled connection and commit it."""
+        started = time.perf_counter()
+        for attempt in range(2):
+            try:
+                with self.connection() as conn, conn.cursor() as cur:
+                    touched = self._stored_years(cur, buf) if self.analytics else set()
+                    self._write_batch(conn, cur, buf)
+                    conn.commit()
+                if self.analytics:
+                    with self._touched_lock:
+                        self._touched_years |= touched | {m.year for m in buf}
+                metrics.FLUSH_SECONDS.observe(time.perf_counter() - started, "postgres", self.load_method)
+                metrics.FLUSH_ROWS.observe(len(buf), "postgres")
+                return
+            except errors.DeadlockDetected:
+                # concurrent batches touching the same rows; one retry settles it
+                if attempt:
+                    raise
+                logger.warning("Deadlock while flushing batch; retrying")
+
+    @staticmethod
+    def _stored_years(cur, buf: list[Movie]) -> set[int]:
+        """Years these titles currently have, so a changed year refreshes both partitions."""
+        cur.execute(
+            "SELECT DISTINCT year FROM movies WHERE movie_id = ANY(%s)",
+            ([m.movie_id for m in buf],),
+        )
+        return {row[0] for row in cur.fetchall()}
+
+    def _write_batch(self, conn, cur, buf: list[Movie]) -> None:
+        if self.load_method == "copy":
+            try:
+                self._copy_batch(cur, buf)
+                return
+            except (psycopg2.ProgrammingError, psycopg2.NotSupportedError) as e:
+                conn.rollback()
+                with self._load_method_lock:
+                    if self.load_method == "copy":
+                        logger.warning("COPY load failed (%s); falling back to execute_batch", e)
+                        self.load_method = "batch"
+
+        self._insert_batch(cur, buf)
+
+    # ------------------------------------------------------------------
+    # COPY + staging merge
+    # ------------------------------------------------------------------
+    def _ensure_staging_tables(self, cur) -> None:
+        # temp tables are session-local and never WAL-logged; rows go away on commit
+        cur.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS movies_stage (
+                seq        INTEGER,
+                movie_id   TEXT,
+                title      TEXT,
+                year       INTEGER,
+                rating     NUMERIC(3,1),
+                duration   INTEGER,
+                metascore  NUMERIC(4,1)
+            ) ON COMMIT DELETE ROWS
+            """
+        )
+        cur.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS cast_stage (
+                seq            INTEGER,
+                movie_id       TEXT,
+                billing_order  SMALLINT,
+                actor_id       TEXT,
+                name           TEXT
+            ) ON COMMIT DELETE ROWS
+            """
+        )
+
+    @staticmethod
+    def _copy_rows(cur, table: str, columns: tuple, rows) -> None:
+        data = io.StringIO()
+        csv.writer(data).writerows(rows)
+        data.seek(0)
+        cur.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            data,
+        )
 
-    def _flush_batch(self, cur, buf: list[Movie]) -> None:
+    def _copy_batch(self, cur, buf: list[Movie]) -> None:
+        self._ensure_staging_tables(cur)
+        # seq = position in the batch; a title listed twice keeps its last record
+        self._copy_rows(
+            cur, "movies_stage", ("seq",) + MOVIE_COLUMNS,
+            ((seq, m.movie_id, m.title, m.year, m.rating, m.duration, m.metascore) for seq, m in enumerate(buf)),
+        )
+        self._copy_rows(
+            cur, "cast_stage", ("seq",) + CAST_COLUMNS,
+            (
+                (seq, m.movie_id, order, a.actor_id, a.name)
+                for seq, m in enumerate(buf) for order, a in enumerate(m.actors, start=1)
+            ),
+        )
+
+        cur.execute(
+            """
+            INSERT INTO movies (movie_id, title, year, rating, duration, metascore)
+            SELECT DISTINCT ON (movie_id) movie_id, title, year, rating, duration, metascore
+            FROM   movies_stage
+            ORDER  BY movie_id, seq DESC
+            ON CONFLICT (movie_id) DO UPDATE
+            SET    title      = EXCLUDED.title,
+                   year       = EXCLUDED.year,
+                   rating     = EXCLUDED.rating,
+                   duration   = EXCLUDED.duration,
+                   metascore  = EXCLUDED.metascore,
+                   updated_at = CURRENT_TIMESTAMP
+            """
+        )
+        # people in actor_id order, so parallel batches lock shared rows in the same order
+        cur.execute(
+            """
+            INSERT INTO people (actor_id, name)
+            SELECT DISTINCT ON (actor_id) actor_id, name
+            FROM   cast_stage
+            ORDER  BY actor_id, seq DESC
+            ON CONFLICT (actor_id) DO UPDATE
+            SET    name = EXCLUDED.name
+            WHERE  people.name IS DISTINCT FROM EXCLUDED.name
+            """
+        )
+        # a re-scraped title gets its whole cast replaced, billing may have changed
+        cur.execute(
+            """
+            DELETE FROM movie_cast
+            WHERE  movie_id IN (SELECT movie_id FROM movies_stage)
+            """
+        )
+        cur.execute(
+            """
+            INSERT INTO movie_cast (movie_id, actor_id, billing_order)
+            SELECT DISTINCT ON (movie_id, actor_id) movie_id, actor_id, billing_order
+            FROM   cast_stage
+            WHERE  (movie_id, seq) IN (SELECT movie_id, max(seq) FROM movies_stage GROUP BY movie_id)
+            ORDER  BY movie_id, actor_id, billing_order
+            """
+        )
+
+    # ------------------------------------------------------------------
+    # execute_batch fallback
+    # ------------------------------------------------------------------
+    def _insert_batch(self, cur, buf: list[Movie]) -> None:
+        # a title listed twice keeps its last record, as in the COPY path
+        buf = list({m.movie_id: m for m in buf}.values())
         # movies
         movie_rows = [(m.movie_id, m.title, m.year, m.rating, m.duration, m.metascore) for m in buf]
         execute_batch(
@@ -102,30 +446,142 @@ class PostgresHandler(BasePersistence):
             """
             INSERT INTO movies (movie_id, title, year, rating, duration, metascore)
             VALUES (%s, %s, %s, %s, %s, %s)
-            ON CONFLICT (movie_id) DO NOTHING
+            ON CONFLICT (movie_id) DO UPDATE
+            SET    title      = EXCLUDED.title,
+                   year       = EXCLUDED.year,
+                   rating     = EXCLUDED.rating,
+                   duration   = EXCLUDED.duration,
+                   metascore  = EXCLUDED.metascore,
+                   updated_at = CURRENT_TIMESTAMP
             """,
             movie_rows,
         )
 
-        # actors
-        actor_rows = [
-            (m.movie_id, a.actor_id, a.name)
+        # people
+        people = {a.actor_id: a.name for m in buf for a in m.actors}
+        if people:
+            execute_batch(
+                cur,
+                """
+                INSERT INTO people (actor_id, name)
+                VALUES (%s, %s)
+                ON CONFLICT (actor_id) DO UPDATE
+                SET    name = EXCLUDED.name
+                WHERE  people.name IS DISTINCT FROM EXCLUDED.name
+                """,
+                sorted(people.items()),
+            )
+
+        # cast, replaced per title
+        cur.execute(
+            "DELETE FROM movie_cast WHERE movie_id = ANY(%s)",
+            ([m.movie_id for m in buf],),
+        )
+        # a person listed twice keeps their first billing, as in the COPY path
+        cast_rows = {
+            (m.movie_id, a.actor_id): order
             for m in buf
-            for a in (m.actors or [])
-        ]
-        if actor_rows:
+            for order, a in reversed(list(enumerate(m.actors, start=1)))
+        }
+        if cast_rows:
             execute_batch(
                 cur,
                 """
-                INSERT INTO actors (movie_id, actor_id, name)
+                INSERT INTO movie_cast (movie_id, actor_id, billing_order)
                 VALUES (%s, %s, %s)
-                ON CONFLICT (movie_id, actor_id) DO NOTHING
                 """,
-                actor_rows,
+                [(movie_id, actor_id, order) for (movie_id, actor_id), order in cast_rows.items()],
+            )
+
+    # ------------------------------------------------------------------
+    # queries
+    # ------------------------------------------------------------------
+    def get_movies_by_year(self, year: int) -> Iterator[Movie]:
+        return self._paged(
+            "SELECT movie_id, title, year, rating, duration, metascore FROM movies "
+            "WHERE year = %s AND movie_id > %s ORDER BY movie_id LIMIT %s",
+            (year,),
+        )
+
+    def get_movie(self, movie_id: str) -> Optional[Movie]:
+        return next(self._paged(
+            "SELECT movie_id, title, year, rating, duration, metascore FROM movies "
+            "WHERE movie_id = %s AND movie_id > %s ORDER BY movie_id LIMIT %s",
+            (movie_id,),
+        ), None)
+
+    def get_movies_by_actor(self, actor_id: str) -> Iterator[Movie]:
+        return self._paged(
+            "SELECT m.movie_id, m.title, m.year, m.rating, m.duration, m.metascore "
+            "FROM movie_cast c JOIN movies m USING (movie_id) "
+            "WHERE c.actor_id = %s AND c.movie_id > %s ORDER BY c.movie_id LIMIT %s",
+            (actor_id,),
+        )
+
+    def _paged(self, sql: str, params: tuple) -> Iterator[Movie]:
+        """
+        Keyset pagination over `sql`, which must filter on `movie_id > %s`,
+        order by movie_id and end in LIMIT %s. Each page is one indexed
+        range scan that starts after the last id of the previous page, so
+        deep pages cost the same as the first; the cast of a page is
+        fetched in one extra query.
+        """
+        registry = ActorRegistry()
+        last_id = ""
+        while True:
+            with self.connection() as conn, conn.cursor() as cur:
+                cur.execute(sql, params + (last_id, self.query_page_size))
+                rows = cur.fetchall()
+                cast: dict[str, list] = {}
+                if rows:
+                    cur.execute(
+                        """
+                        SELECT c.movie_id, c.actor_id, p.name
+                        FROM   movie_cast c
+                        JOIN   people p USING (actor_id)
+                        WHERE  c.movie_id = ANY(%s)
+                        ORDER  BY c.movie_id, c.billing_order
+                        """,
+                        ([row[0] for row in rows],),
+                    )
+                    for movie_id, actor_id, name in cur.fetchall():
+                        cast.setdefault(movie_id, []).append(registry.get(actor_id=actor_id, name=name))
+                conn.commit()
+
+            for movie_id, title, year, rating, duration, metascore in rows:
+                yield Movie(
+                    movie_id=movie_id,
+                    title=title,
+                    year=year,
+                    rating=float(rating),
+                    duration=duration,
+                    actors=tuple(cast.get(movie_id, ())),
+                    metascore=int(metascore) if metascore is not None else None,
+                )
+            if len(rows) < self.query_page_size:
+                return
+            last_id = rows[-1][0]
+
+    def load_chart_state(self) -> dict:
+        """
+        Last persisted state per title for the incremental scrape mode:
+        movie_id -> {"rating", "fetched_at"}.
+        """
+        with self.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "SELECT movie_id, rating, EXTRACT(EPOCH FROM COALESCE(updated_at, created_at)) FROM movies"
             )
-        self.conn.commit()
+            rows = cur.fetchall()
+            conn.commit()
+        return {
+            movie_id: {"rating": float(rating), "fetched_at": float(fetched_at or 0)}
+            for movie_id, rating, fetched_at in rows
+        }
 
     def close(self) -> None:
-        if self.conn:
-            self.conn.close()
-            logger.info("PostgreSQL connection closed")
\ No newline at end of file
+        """Drain pending flushes, then close every pooled connection."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if not self.pool.closed:
+            self.pool.closeall()
+            logger.info("PostgreSQL connection pool closed")
\ No newline at end of file
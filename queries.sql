@@ -6,67 +6,75 @@ CREATE TABLE IF NOT EXISTS movies (
     rating     NUMERIC(3,1) NOT NULL,
     duration   INTEGER,
     metascore  NUMERIC(4,1),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE TABLE IF NOT EXISTS actors (
-    movie_id  TEXT REFERENCES movies(movie_id) ON DELETE CASCADE,
-    actor_id  TEXT NOT NULL,
-    name      VARCHAR(255) NOT NULL,
+CREATE TABLE IF NOT EXISTS people (
+    actor_id  TEXT PRIMARY KEY,
+    name      VARCHAR(255) NOT NULL
+);
+
+-- billing_order is the position in the title's cast list (1 = lead)
+CREATE TABLE IF NOT EXISTS movie_cast (
+    movie_id       TEXT REFERENCES movies(movie_id) ON DELETE CASCADE,
+    actor_id       TEXT NOT NULL REFERENCES people(actor_id),
+    billing_order  SMALLINT NOT NULL,
     PRIMARY KEY (movie_id, actor_id)
 );
 
--- 2. Top-5 longest average duration per decade
-WITH decade AS (
-    SELECT *, (year / 10) * 10 AS decade_start
-    FROM   movies
-),
-ranked AS (
-    SELECT *, ROW_NUMBER() OVER (PARTITION BY decade_start ORDER BY duration DESC) AS rn
-    FROM   decade
-)
-SELECT decade_start, title, duration
-FROM   ranked
+-- databases created before people / movie_cast keep their cast in `actors`;
+-- PostgresHandler moves it over once and renames the table actors_migrated
+
+-- 2-4 are precomputed by persistence/pg_analytics.py and refreshed after
+-- every load (only for the years the load touched), so reads stay cheap
+-- regardless of table size. The definitions live in that module.
+
+-- 2. Top-5 longest movies per decade (PG_ANALYTICS_TOP_N)
+SELECT decade_start, rn, title, duration
+FROM   decade_longest
 WHERE  rn <= 5
 ORDER  BY decade_start, rn;
 
 -- 3. Standard deviation of ratings per year
-SELECT year,
-       STDDEV_POP(rating)::NUMERIC(4,2) AS stddev_rating
-FROM   movies
-GROUP  BY year
+SELECT year, stddev_rating
+FROM   year_rating_stats
 ORDER  BY year;
 
 -- 4. Movies with > 20 % difference (IMDB vs Metascore)
-SELECT movie_id,
-       title,
-       year,
-       rating,
-       metascore,
-       ABS(rating - metascore) / GREATEST(rating, metascore) * 100 AS diff_pct
-FROM   movies
-WHERE  ABS(rating - metascore) / GREATEST(rating, metascore) > 0.2
+SELECT movie_id, title, year, rating, metascore, diff_pct
+FROM   rating_divergence
 ORDER  BY diff_pct DESC;
 
--- 5. View: movies + actors (flagging the first stored actor as lead)
+-- analytics schema version currently deployed
+SELECT component, version, applied_at FROM analytics_version;
+
+-- 5. View: movies + cast (lead = top billed)
 CREATE OR REPLACE VIEW movies_actors AS
 SELECT m.movie_id,
        m.title,
        m.year,
        m.rating,
-       a.actor_id,
-       a.name,
-       a.actor_id = (
-           SELECT MIN(actor_id)
-           FROM   actors
-           WHERE  actors.movie_id = m.movie_id
-       ) AS is_lead
+       c.actor_id,
+       p.name,
+       c.billing_order = 1 AS is_lead,
+       c.billing_order
 FROM   movies m
-JOIN   actors a ON a.movie_id = m.movie_id;
+JOIN   movie_cast c ON c.movie_id = m.movie_id
+JOIN   people p     ON p.actor_id = c.actor_id;
+
+-- lead actor per movie; billing_order = 1 matches idx_movie_cast_lead
+SELECT movie_id, title, year, actor_id, name
+FROM   movies_actors
+WHERE  billing_order = 1
+ORDER  BY year, title;
 
 -- 6. Recommended indexes for frequent filters
-CREATE INDEX IF NOT EXISTS idx_movies_year   ON movies(year);
-CREATE INDEX IF NOT EXISTS idx_actors_name   ON actors(name);
+DROP INDEX IF EXISTS idx_movies_year;  -- older year-only index, superseded below
+CREATE INDEX IF NOT EXISTS idx_movies_year_movie ON movies(year, movie_id);
+CREATE INDEX IF NOT EXISTS idx_people_name       ON people(name);
+CREATE INDEX IF NOT EXISTS idx_movie_cast_actor_movie ON movie_cast(actor_id, movie_id);
+CREATE INDEX IF NOT EXISTS idx_movie_cast_lead   ON movie_cast(movie_id) WHERE billing_order = 1;
 
 -- 7. Window-function example: top-3 longest films per decade
 SELECT *
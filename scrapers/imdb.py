@@ -1,19 +1,43 @@
 import os
 import json
-from bs4 import BeautifulSoup
-from typing import Dict, Iterator
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from utils.logging_config import setup_logger
 from .base_scraper import BaseScraper
+from .imdb_parser import MovieRecord, ParseStage, graphql_payload, graphql_records, parse_title_page
 from utils.request_handler import RequestHandler
-from models.movie_model import Movie, Actor
+from utils.async_request_handler import AsyncRequestHandler
+from utils.async_bridge import stream_from_async
+from utils.scrape_state import ScrapeState
+from utils.checkpoint import CheckpointJournal
+from utils.retry import DeadLetters, DelayQueue, FetchError, RetryPolicy, classify
+from utils import metrics
+from models.movie_model import Movie
+from models.actor_registry import ActorRegistry
+
+# Top 250 chart query, used when IMDB_URL is not set
+DEFAULT_CHART_URL = (
+    'https://caching.graphql.imdb.com/?operationName=Top250MoviesPagination&variables={"first":250,"isInPace":false,"locale":"en-US"}&extensions={"persistedQuery":{"sha256Hash":"2db1d515844c69836ea8dc532d5bff27684fdce990c465ebf52d36d185a187b3","version":1}}'
+)
 
 class IMDBScraper(BaseScraper):
     def __init__(self, request_handler: RequestHandler = None):
         super().__init__()
         self.logger = setup_logger(__name__)
         self.request_handler = request_handler or RequestHandler()
+        self.actor_registry = ActorRegistry()
         self.max_retries = os.getenv("MAX_RETRIES", 3)
+        self.base_url = os.getenv("IMDB_BASE_URL", "https://www.imdb.com").rstrip("/")
+        self.detail_source = os.getenv("DETAIL_SOURCE", "html").lower()
+        if self.detail_source not in ("html", "graphql"):
+            raise ValueError(f"DETAIL_SOURCE must be 'html' or 'graphql', got '{self.detail_source}'")
+        self.graphql_url = os.getenv("GRAPHQL_URL", "https://api.graphql.imdb.com/")
+        self.graphql_batch_size = max(1, int(os.getenv("GRAPHQL_BATCH_SIZE") or 50))
+        self.retry_policy = RetryPolicy()
+        self.dead_letters = DeadLetters()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:140.0) Gecko/20100101 Firefox/140.0',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -50,104 +74,493 @@ class IMDBScraper(BaseScraper):
         url: str,
         use_proxy: bool = False,
         verify_proxy: bool = False,
+        state: Optional[ScrapeState] = None,
+        journal: Optional[CheckpointJournal] = None,
+        edges: Optional[Iterable[Dict]] = None,
     ) -> Iterator[Movie]:
         """
         Stream top-250 titles from the IMDB chart.
         Yields Movie objects one at a time.
+        With a ScrapeState only new, changed or stale titles are fetched;
+        titles are marked fetched in memory as they are yielded, and the
+        caller saves the state once the sinks stored them.
+        With a CheckpointJournal every finished title is journaled; titles
+        already in it are replayed first and not fetched again.
+        `edges` replaces the chart request with edges from elsewhere (the
+        work queue in worker mode).
+        Titles that fail for good are listed in `dead_letters` and reported
+        when the stream ends.
         """
-        self.logger.info(f"Scraping URL: {url}")
+        self.logger.info("Scraping URL: %s", url)
+        self.dead_letters = DeadLetters()
+
+        edges_by_id: Dict[str, Dict] = {}
+        selected = 0
+
+        def _selected_edges() -> Iterator[Dict]:
+            nonlocal selected
+            source = edges if edges is not None else self._iter_chart_edges(url, use_proxy, verify_proxy)
+            for edge in source:
+                movie_id = edge["node"]["id"]
+                edges_by_id[movie_id] = edge
+                if journal is not None and movie_id in journal:
+                    if state is not None:
+                        state.mark_fetched(edge)
+                    continue
+                if state is None or state.needs_fetch(edge):
+                    selected += 1
+                    yield edge
+            if state is not None:
+                self.logger.info(
+                    "Incremental mode: %s of %s titles new, changed or stale", selected, len(edges_by_id)
+                )
+
+        engine = os.getenv("FETCH_ENGINE", "async").lower()
+        if engine == "threads":
+            stream = self._extract_threaded(_selected_edges(), use_proxy, verify_proxy)
+        else:
+            stream = self._extract_async(_selected_edges(), use_proxy, verify_proxy)
 
         try:
-            response = self.request_handler.get(
-                url,
-                headers=self.api_headers,
-                use_proxy=use_proxy,
-                verify_proxy=verify_proxy,
-            )
-            edges = response.json()["data"]["chartTitles"]["edges"]
-        except Exception as e:
-            self.logger.error(f"Failed to fetch chart at {url}: {e}", exc_info=True)
-            raise
+            if journal is not None and journal.completed:
+                self.logger.info("Replaying %s journaled titles", len(journal.completed))
+                yield from journal.replay(self.actor_registry)
+            for movie in stream:
+                if movie is not None:
+                    if state is not None and movie.movie_id in edges_by_id:
+                        state.mark_fetched(edges_by_id[movie.movie_id])
+                    if journal is not None:
+                        journal.record(movie)
+                    metrics.MOVIES_SCRAPED.inc()
+                    yield movie
+        finally:
+            if journal is not None:
+                journal.sync()
+            self.dead_letters.report()
+            self.logger.info("Rate limiter: %s", self.request_handler.rate_limiter.snapshot())
+
+    def chart_edges(self, url: str, use_proxy: bool = False, verify_proxy: bool = False) -> Iterator[Dict]:
+        """Chart edges only, without fetching any detail page (the coordinator's input)"""
+        return self._iter_chart_edges(url, use_proxy, verify_proxy)
+
+    def _iter_chart_edges(self, url: str, use_proxy: bool, verify_proxy: bool) -> Iterator[Dict]:
+        """
+        Stream chart edges page by page following the GraphQL cursor
+        (pageInfo.endCursor -> variables.after). Page N+1 is requested in the
+        background while the edges of page N are handed to the detail fetchers.
+        CHART_PAGE_SIZE=0 fetches the URL as-is in a single request.
+        """
+        page_size = int(os.getenv("CHART_PAGE_SIZE", "100"))
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-prefetch") as prefetch:
+            future = prefetch.submit(self._fetch_chart_page, url, page_size, None, use_proxy, verify_proxy)
+            seen_cursors = set()
+            page = 0
+            while future is not None:
+                try:
+                    chart = future.result()
+                except Exception as e:
+                    self.logger.error("Failed to fetch chart page %s at %s: %s", page + 1, url, e, exc_info=True)
+                    raise
+
+                page += 1
+                page_info = chart.get("pageInfo") or {}
+                cursor = page_info.get("endCursor")
+                future = None
+                if page_size and page_info.get("hasNextPage") and cursor and cursor not in seen_cursors:
+                    seen_cursors.add(cursor)
+                    future = prefetch.submit(
+                        self._fetch_chart_page, url, page_size, cursor, use_proxy, verify_proxy
+                    )
+
+                self.logger.info("Chart page %s: %s titles", page, len(chart['edges']))
+                yield from chart["edges"]
+
+    def _fetch_chart_page(
+        self, url: str, page_size: int, after: Optional[str], use_proxy: bool, verify_proxy: bool
+    ) -> Dict:
+        page_url = self._chart_page_url(url, page_size, after) if page_size else url
+        response = self.request_handler.get(
+            page_url,
+            headers=self.api_headers,
+            use_proxy=use_proxy,
+            verify_proxy=verify_proxy,
+        )
+        return response.json()["data"]["chartTitles"]
+
+    @staticmethod
+    def _chart_page_url(url: str, page_size: int, after: Optional[str]) -> str:
+        """Rewrite the `first`/`after` GraphQL variables of a persisted-query URL."""
+        parts = urlsplit(url)
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        rewritten = []
+        for key, value in query:
+            if key == "variables":
+                variables = json.loads(value)
+                variables["first"] = page_size
+                if after:
+                    variables["after"] = after
+                else:
+                    variables.pop("after", None)
+                value = json.dumps(variables, separators=(",", ":"))
+            rewritten.append((key, value))
+        return urlunsplit(parts._replace(query=urlencode(rewritten, quote_via=quote)))
 
-        def _parse_node(movie_node: Dict) -> Movie:
+    def _extract_threaded(self, edges: Iterator[Dict], use_proxy: bool, verify_proxy: bool) -> Iterator[Movie]:
+        """
+        Fetch detail pages on a ThreadPoolExecutor (one blocking request per thread).
+        Work units are submitted as they arrive, keeping at most two per worker queued.
+        Pages are parsed by the ParseStage (inline or on worker processes).
+        With DETAIL_SOURCE=graphql a unit is a batch of titles; the ones the
+        batch could not deliver are resubmitted as title-page fetches.
+        A failed title frees its thread at once and waits on a delay queue
+        for its next attempt (see RetryPolicy).
+        """
+        def _parse_node(movie_node: Dict, attempt: int) -> Tuple[List[Movie], List[Dict]]:
             imdb_id = movie_node["node"]["id"]
-            movie_url = f"https://www.imdb.com/title/{imdb_id}"
-            movie = self._parse_movie_details(
-                movie_url,
-                use_proxy=use_proxy,
-                verify_proxy=verify_proxy,
-            )
-            return movie
+            movie_url = f"{self.base_url}/title/{imdb_id}"
+            if attempt > 1:
+                self._rotate_proxy(use_proxy)
+            with metrics.trace(imdb_id, attempt=attempt):
+                movie = self._parse_movie_details(
+                    movie_url,
+                    use_proxy=use_proxy,
+                    verify_proxy=verify_proxy,
+                    parse_stage=parse_stage,
+                )
+            return [movie], []
 
-        max_workers = int(os.getenv("MAX_CONCURRENT_REQUESTS", "5"))
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_node = {
-                executor.submit(_parse_node, edge): edge
-                for edge in edges
-            }
+        def _submit(batch: List[Dict], attempt: int, graphql: bool = False) -> None:
+            if graphql:
+                future = executor.submit(self._graphql_details, batch, use_proxy)
+            else:
+                future = executor.submit(_parse_node, batch[0], attempt)
+            future_to_work[future] = (batch, attempt)
 
-            for future in as_completed(future_to_node):
+        def _collect(done) -> Iterator[Movie]:
+            for future in done:
+                batch, attempt = future_to_work.pop(future)
                 try:
-                    yield future.result()
+                    movies, fallback = future.result()
+                except FetchError as e:
+                    edge = batch[0]
+                    self._retry_later(edge, attempt, e, lambda delay: delayed.push((edge, attempt + 1), delay))
+                    continue
                 except Exception as e:
-                    node = future_to_node[future]
                     self.logger.error(
-                        f"Error parsing {node['node']['id']}: {e}", exc_info=True
+                        "Error parsing %s: %s", ", ".join(edge["node"]["id"] for edge in batch), e, exc_info=True
                     )
                     continue
+                for edge in fallback:
+                    _submit([edge], 1)
+                yield from movies
+
+        def _submit_due() -> None:
+            for edge, attempt in delayed.pop_due():
+                _submit([edge], attempt)
+
+        def _wait() -> Iterator[Movie]:
+            timeout = delayed.next_due_in()
+            if future_to_work:
+                done, _ = wait(future_to_work, timeout=timeout, return_when=FIRST_COMPLETED)
+                yield from _collect(done)
+            else:
+                time.sleep(timeout)
+            _submit_due()
 
-    def _parse_movie_details(self, detail_url: str, use_proxy: bool, verify_proxy: bool) -> Dict:
-        """Extract and parse movie data"""
-        json_data = self._get_movie_details(detail_url, use_proxy, verify_proxy)
+        max_workers = int(os.getenv("MAX_CONCURRENT_REQUESTS", "5"))
+        future_to_work: Dict = {}
+        delayed = DelayQueue()
+        metrics.QUEUE_DEPTH.set_function(lambda: len(delayed), "retry_delayed")
+        parse_stage = ParseStage()
         try:
-            movie_details = json_data["props"]["pageProps"]["mainColumnData"]
-            _id = movie_details["id"]
-            title = movie_details["originalTitleText"]["text"]
-            release_year = movie_details["releaseDate"]["year"]
-            rating = movie_details["ratingsSummary"]["aggregateRating"]
-            runtime = movie_details["runtime"]["seconds"]
-            actors = self._parse_actors(movie_details, _id)
-            metascore = self.safe_get(json_data, "props", "pageProps", "aboveTheFoldData", "metacritic", "metascore", "score") 
-            return Movie(
-                movie_id=_id,
-                title=title,
-                year=release_year,
-                rating=rating,
-                duration=runtime // 60,
-                actors=actors,
-                metascore=metascore
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for batch in self._detail_batches(edges):
+                    _submit_due()
+                    _submit(batch, 1, graphql=self.detail_source == "graphql")
+                    while len(future_to_work) >= max_workers * 2:
+                        yield from _wait()
+
+                while future_to_work or delayed:
+                    yield from _wait()
+        finally:
+            parse_stage.close()
+            metrics.QUEUE_DEPTH.remove("retry_delayed")
+
+    def _extract_async(self, edges: Iterator[Dict], use_proxy: bool, verify_proxy: bool) -> Iterator[Movie]:
+        """
+        Fetch detail pages on an asyncio event loop.
+        MAX_CONCURRENT_REQUESTS workers share one AsyncSession, so the limit
+        can be raised to hundreds without paying for a thread per request.
+        Workers only fetch; the raw pages go to the ParseStage, so with
+        PARSE_WORKERS set parsing runs on other cores while the loop keeps
+        fetching. With DETAIL_SOURCE=graphql a worker takes a batch of titles
+        and fetches the title pages of whatever the batch could not deliver
+        concurrently. A failed title is parked in a sleeping task until its
+        next attempt is due (see RetryPolicy), so its worker moves on at once.
+        """
+        concurrency = int(os.getenv("MAX_CONCURRENT_REQUESTS", "5"))
+
+        async def produce(emit) -> None:
+            handler = AsyncRequestHandler(
+                self.request_handler.proxy_handler,
+                max_clients=concurrency,
+                cache=self.request_handler.cache,
+                rate_limiter=self.request_handler.rate_limiter,
             )
+            workers = max(1, concurrency)
+            # (titles, attempt); retries come back through the same queue
+            pending: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+            delayed: set = set()
+            metrics.QUEUE_DEPTH.set_function(pending.qsize, "fetch_pending")
+            metrics.QUEUE_DEPTH.set_function(lambda: len(delayed), "retry_delayed")
+            loop = asyncio.get_running_loop()
+            feed_errors: list = []
+            # work queued, in progress or waiting to be retried
+            open_items = 0
+            drained = asyncio.Event()
+
+            def settle() -> None:
+                nonlocal open_items
+                open_items -= 1
+                if not open_items:
+                    drained.set()
+
+            async def requeue(edge: Dict, attempt: int, delay: float) -> None:
+                await asyncio.sleep(delay)
+                await pending.put(([edge], attempt))
+
+            def schedule(edge: Dict, attempt: int, delay: float) -> None:
+                nonlocal open_items
+                open_items += 1
+                drained.clear()
+                task = loop.create_task(requeue(edge, attempt, delay))
+                delayed.add(task)
+                task.add_done_callback(delayed.discard)
+
+            async def feed() -> None:
+                nonlocal open_items
+                # the chart is paged with blocking requests; pull it off-loop, always on the same thread
+                try:
+                    while (batch := await loop.run_in_executor(chart_reader, next, batches, None)) is not None:
+                        open_items += 1
+                        drained.clear()
+                        await pending.put((batch, 1))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    feed_errors.append(e)
+                if open_items:
+                    await drained.wait()
+                for _ in range(workers):
+                    await pending.put(None)
+
+            async def fetch_page(edge: Dict, attempt: int) -> None:
+                imdb_id = edge["node"]["id"]
+                movie_url = f"{self.base_url}/title/{imdb_id}"
+                if attempt > 1:
+                    self._rotate_proxy(use_proxy)
+                try:
+                    with metrics.trace(imdb_id, attempt=attempt):
+                        with metrics.span("fetch"):
+                            try:
+                                response = await handler.get(
+                                    movie_url,
+                                    headers=self.api_headers,
+                                    use_proxy=use_proxy,
+                                    verify_proxy=verify_proxy,
+                                    max_retries=1,
+                                )
+                            except asyncio.CancelledError:
+                                raise
+                            except Exception as e:
+                                raise FetchError(classify(e), e) from e
+                        with metrics.span("parse", bytes=len(response.content)):
+                            try:
+                                record = await parse_stage.parse_async(response.content)
+                            except Exception as e:
+                                raise FetchError("parse", e) from e
+                        movie = self._build_movie(record)
+                    await emit(movie)
+                except asyncio.CancelledError:
+                    raise
+                except FetchError as e:
+                    self._retry_later(edge, attempt, e, lambda delay: schedule(edge, attempt + 1, delay))
+                except Exception as e:
+                    self.logger.error("Error parsing %s: %s", imdb_id, e, exc_info=True)
+
+            async def worker() -> None:
+                while True:
+                    item = await pending.get()
+                    if item is None:
+                        return
+                    batch, attempt = item
+                    try:
+                        if self.detail_source != "graphql" or attempt > 1:
+                            await fetch_page(batch[0], attempt)
+                            continue
+                        movies, fallback = await self._graphql_details_async(handler, batch, use_proxy)
+                        for movie in movies:
+                            await emit(movie)
+                        await asyncio.gather(*(fetch_page(edge, 1) for edge in fallback))
+                    finally:
+                        settle()
+
+            chart_reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-reader")
+            try:
+                await asyncio.gather(feed(), *(worker() for _ in range(workers)))
+            finally:
+                for task in list(delayed):
+                    task.cancel()
+                # also on cancellation: stops the chart prefetch; queued behind any next() still running
+                await loop.run_in_executor(chart_reader, batches.close)
+                chart_reader.shutdown(wait=False)
+                await handler.close()
+                metrics.QUEUE_DEPTH.remove("fetch_pending")
+                metrics.QUEUE_DEPTH.remove("retry_delayed")
+            if feed_errors:
+                raise feed_errors[0]
+
+        queue_size = int(os.getenv("FETCH_QUEUE_SIZE", "1000"))
+        batches = self._detail_batches(edges)
+        parse_stage = ParseStage()
+        try:
+            yield from stream_from_async(produce, maxsize=queue_size, name="fetch_results")
+        finally:
+            parse_stage.close()
+
+    def _detail_batches(self, edges: Iterator[Dict]) -> Iterator[List[Dict]]:
+        """Edges grouped into work units: single titles, or GRAPHQL_BATCH_SIZE titles for GraphQL"""
+        size = self.graphql_batch_size if self.detail_source == "graphql" else 1
+        batch: List[Dict] = []
+        for edge in edges:
+            batch.append(edge)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _graphql_details(self, batch: List[Dict], use_proxy: bool) -> Tuple[List[Movie], List[Dict]]:
+        """
+        Details of a batch of titles in one GraphQL request. Returns the
+        movies and the edges to fetch from their title pages instead.
+        """
+        ids = [edge["node"]["id"] for edge in batch]
+        try:
+            with metrics.trace(ids[0], name="graphql_batch", titles=len(ids)):
+                with metrics.span("fetch"):
+                    response = self.request_handler.post(
+                        self.graphql_url,
+                        graphql_payload(ids),
+                        headers=self.api_headers,
+                        use_proxy=use_proxy,
+                        max_retries=1,
+                    )
+                with metrics.span("parse", bytes=len(response.content)):
+                    records = graphql_records(response.json())
         except Exception as e:
-            self.logger.error(f"Error parsing {detail_url} details {e}")
+            self.logger.warning("GraphQL batch of %s titles failed: %s", len(ids), e)
+            records = {}
+        return self._split_batch(batch, records)
 
-    def _get_movie_details(self, url: str, use_proxy: bool, verify_proxy: bool) -> Dict:
-        """Obtain aditional movie details"""
+    async def _graphql_details_async(
+        self, handler: AsyncRequestHandler, batch: List[Dict], use_proxy: bool
+    ) -> Tuple[List[Movie], List[Dict]]:
+        """asyncio counterpart of _graphql_details"""
+        ids = [edge["node"]["id"] for edge in batch]
         try:
-            response = self.request_handler.get(url, headers=self.api_headers, use_proxy=use_proxy, verify_proxy=verify_proxy)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            json_data = json.loads(soup.find("script", {"id":"__NEXT_DATA__"}).contents[0])
-            return json_data
+            with metrics.trace(ids[0], name="graphql_batch", titles=len(ids)):
+                with metrics.span("fetch"):
+                    response = await handler.post(
+                        self.graphql_url,
+                        graphql_payload(ids),
+                        headers=self.api_headers,
+                        use_proxy=use_proxy,
+                        max_retries=1,
+                    )
+                with metrics.span("parse", bytes=len(response.content)):
+                    records = graphql_records(response.json())
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            self.logger.warning(f"Error getting details for {url}: {str(e)}")
-
-    def _parse_actors(self, movie_details: dict, movie_id: str) -> list[Actor]:
-        actors = list()
-        for actor in movie_details["cast"]["edges"]:
-            actor_data = actor["node"]["name"]
-            actors.append(
-                Actor(
-                    name=actor_data["nameText"]["text"],
-                    movie_id=movie_id,
-                    actor_id=actor_data["id"]
+            self.logger.warning("GraphQL batch of %s titles failed: %s", len(ids), e)
+            records = {}
+        return self._split_batch(batch, records)
+
+    def _split_batch(self, batch: List[Dict], records: Dict[str, MovieRecord]) -> Tuple[List[Movie], List[Dict]]:
+        movies, fallback = [], []
+        for edge in batch:
+            record = records.get(edge["node"]["id"])
+            if record is None:
+                fallback.append(edge)
+                continue
+            try:
+                movies.append(self._build_movie(record))
+            except Exception as e:
+                # one malformed title must not cost the rest of the batch
+                self.logger.warning("GraphQL record for %s unusable (%s); using its title page", edge["node"]["id"], e)
+                fallback.append(edge)
+        metrics.GRAPHQL_DETAILS.inc("ok", amount=len(movies))
+        if fallback:
+            metrics.GRAPHQL_DETAILS.inc("fallback", amount=len(fallback))
+            self.logger.info("%s of %s titles fall back to their title pages", len(fallback), len(batch))
+        return movies, fallback
+
+    def _parse_movie_details(
+        self,
+        detail_url: str,
+        use_proxy: bool,
+        verify_proxy: bool,
+        parse_stage: Optional[ParseStage] = None,
+    ) -> Movie:
+        """Fetch a title page and parse it into a Movie; raises FetchError"""
+        content = self._get_movie_details(detail_url, use_proxy, verify_proxy)
+        try:
+            with metrics.span("parse", bytes=len(content)):
+                record = parse_stage.parse(content) if parse_stage else parse_title_page(content)
+        except Exception as e:
+            raise FetchError("parse", e) from e
+        return self._build_movie(record)
+
+    def _build_movie(self, record: MovieRecord) -> Movie:
+        """Turn a parsed record into a Movie whose actors come from the shared registry"""
+        movie_id, title, year, rating, duration, metascore, cast = record
+        return Movie(
+            movie_id=movie_id,
+            title=title,
+            year=year,
+            rating=rating,
+            duration=duration,
+            actors=tuple(self.actor_registry.get(actor_id=actor_id, name=name) for actor_id, name in cast),
+            metascore=metascore
+        )
+
+    def _get_movie_details(self, url: str, use_proxy: bool, verify_proxy: bool) -> bytes:
+        """Obtain the raw title page in one attempt; retries are scheduled by the caller"""
+        try:
+            with metrics.span("fetch"):
+                response = self.request_handler.get(
+                    url, headers=self.api_headers, use_proxy=use_proxy, verify_proxy=verify_proxy, max_retries=1
                 )
-            )
-        return actors
+            return response.content
+        except Exception as e:
+            raise FetchError(classify(e), e) from e
 
-    @staticmethod
-    def safe_get(mapping, *keys):
-        for k in keys:
-            if not isinstance(mapping, dict):
-                return None
-            mapping = mapping.get(k)
-        return mapping
+    def _retry_later(self, edge: Dict, attempt: int, error: FetchError, schedule: Callable[[float], None]) -> None:
+        """Pass the delay before the title's next attempt to `schedule`, or dead-letter it"""
+        imdb_id = edge["node"]["id"]
+        delay = self.retry_policy.delay(error.error_class, attempt, error)
+        if delay is None:
+            self.dead_letters.add(imdb_id, error.error_class, attempt, error)
+            metrics.DEAD_LETTERS.inc(error.error_class)
+            self.logger.warning("Giving up on %s after %s attempts: %s", imdb_id, attempt, error)
+            return
+        metrics.RETRIES_SCHEDULED.inc(error.error_class)
+        self.logger.info("Retrying %s in %.1fs (attempt %s failed: %s)", imdb_id, delay, attempt, error)
+        schedule(delay)
 
+    def _rotate_proxy(self, use_proxy: bool) -> None:
+        proxy_handler = self.request_handler.proxy_handler
+        if use_proxy and proxy_handler and proxy_handler.enabled:
+            proxy_handler.rotate_proxy()
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from utils import metrics
+from utils.next_data import extract_next_data
+
+import logging
+logger = logging.getLogger(__name__)
+
+# (movie_id, title, year, rating, duration_minutes, metascore, ((actor_id, name), ...))
+MovieRecord = Tuple[str, str, int, float, int, Optional[int], Tuple[Tuple[str, str], ...]]
+
+
+def next_data_from_html(content: bytes) -> Dict:
+    """
+    Locate the __NEXT_DATA__ script of a title page and decode its JSON.
+    Scans the raw bytes first and only falls back to a full
+    BeautifulSoup parse when that fails.
+    """
+    started = time.perf_counter()
+    try:
+        json_data = extract_next_data(content)
+        if json_data is not None:
+            metrics.PARSE_SECONDS.observe(time.perf_counter() - started, "next_data")
+            return json_data
+    except ValueError as e:
+        logger.debug("Fast __NEXT_DATA__ extraction failed: %s", e)
+
+    soup = BeautifulSoup(content, 'html.parser')
+    json_data = json.loads(soup.find("script", {"id": "__NEXT_DATA__"}).contents[0])
+    metrics.PARSE_SECONDS.observe(time.perf_counter() - started, "bs4_fallback")
+    return json_data
+
+
+def _safe_get(mapping, *keys):
+    for k in keys:
+        if not isinstance(mapping, dict):
+            return None
+        mapping = mapping.get(k)
+    return mapping
+
+
+def _record(details: Dict, metascore: Optional[int]) -> MovieRecord:
+    cast = tuple(
+        (edge["node"]["name"]["id"], edge["node"]["name"]["nameText"]["text"])
+        for edge in details["cast"]["edges"]
+    )
+    return (
+        details["id"],
+        details["originalTitleText"]["text"],
+        details["releaseDate"]["year"],
+        details["ratingsSummary"]["aggregateRating"],
+        details["runtime"]["seconds"] // 60,
+        metascore,
+        cast,
+    )
+
+
+def movie_record(json_data: Dict) -> MovieRecord:
+    """Map a title page's __NEXT_DATA__ payload to a compact, picklable record"""
+    return _record(
+        json_data["props"]["pageProps"]["mainColumnData"],
+        _safe_get(json_data, "props", "pageProps", "aboveTheFoldData", "metacritic", "metascore", "score"),
+    )
+
+
+# Only the fields movie_record reads, aliased to the shape of the title
+# page's mainColumnData so both sources map through _record.
+TITLE_DETAILS_QUERY = """
+query TitleDetails($ids: [ID!]!, $castSize: Int!) {
+  titles(ids: $ids) {
+    id
+    originalTitleText { text }
+    releaseDate { year }
+    ratingsSummary { aggregateRating }
+    runtime { seconds }
+    metacritic { metascore { score } }
+    cast: credits(first: $castSize, filter: { categories: ["cast"] }) {
+      edges { node { name { id nameText { text } } } }
+    }
+  }
+}
+"""
+# the title page lists the first 18 cast members
+GRAPHQL_CAST_SIZE = 18
+
+
+def graphql_payload(ids: List[str]) -> Dict:
+    return {
+        "operationName": "TitleDetails",
+        "query": TITLE_DETAILS_QUERY,
+        "variables": {"ids": ids, "castSize": GRAPHQL_CAST_SIZE},
+    }
+
+
+def graphql_records(json_data: Dict) -> Dict[str, MovieRecord]:
+    """
+    Map a TitleDetails response to records by title id. Titles that came
+    back null, errored or lack a field are left out, so the caller can
+    fetch them some other way.
+    """
+    started = time.perf_counter()
+    records = {}
+    for details in _safe_get(json_data, "data", "titles") or ():
+        try:
+            record = _record(details, _safe_get(details, "metacritic", "metascore", "score"))
+        except (KeyError, TypeError):
+            continue
+        records[record[0]] = record
+    metrics.PARSE_SECONDS.observe(time.perf_counter() - started, "graphql")
+    return records
+
+
+def parse_title_page(content: bytes) -> MovieRecord:
+    """Raw title page bytes -> MovieRecord. Top-level so worker processes can run it."""
+    json_data = next_data_from_html(content)
+    started = time.perf_counter()
+    record = movie_record(json_data)
+    metrics.PARSE_SECONDS.observe(time.perf_counter() - started, "map")
+    return record
+
+
+class ParseStage:
+    """
+    CPU stage of the detail pipeline: raw page bytes in, MovieRecord out.
+
+    With PARSE_WORKERS=0 (default) pages are parsed on the I/O worker that
+    fetched them, or on the loop's default thread pool for the asyncio
+    engine so the event loop keeps serving other requests. Otherwise they are sent to a process pool of
+    that many workers ("auto" = one per core), so decoding and JSON parsing
+    use every core instead of queueing behind the GIL. At most
+    PARSE_QUEUE_SIZE pages wait for or sit in the pool; fetchers beyond
+    that block until a slot frees up, which keeps raw pages from piling up
+    in memory when parsing falls behind.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: Optional[int] = None):
+        if workers is None:
+            env = os.getenv("PARSE_WORKERS", "0").lower()
+            workers = (os.cpu_count() or 1) if env == "auto" else int(env)
+        self.workers = max(0, workers)
+        self.queue_size = max(1, queue_size or int(os.getenv("PARSE_QUEUE_SIZE") or self.workers * 4 or 1))
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+
+        if self.workers:
+            # spawn: forking a process that already runs the fetch loop and
+            # logging threads can copy their locks in a held state
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            metrics.QUEUE_DEPTH.set_function(lambda: self.pending, "parse_pending")
+            logger.info("Parsing on %s worker processes (queue %s)", self.workers, self.queue_size)
+
+    def parse(self, content: bytes) -> MovieRecord:
+        """Blocking parse, for the threaded engine."""
+        if self.pool is None:
+            return parse_title_page(content)
+        with self._slots:
+            with self._lock:
+                self.pending += 1
+            started = time.perf_counter()
+            try:
+                return self.pool.submit(parse_title_page, content).result()
+            finally:
+                with self._lock:
+                    self.pending -= 1
+                metrics.PARSE_SECONDS.observe(time.perf_counter() - started, "process_pool")
+
+    async def parse_async(self, content: bytes) -> MovieRecord:
+        """Non-blocking parse, for the asyncio engine."""
+        if self.pool is None:
+            return await asyncio.get_running_loop().run_in_executor(None, parse_title_page, content)
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.queue_size)
+        async with self._async_slots:
+            with self._lock:
+                self.pending += 1
+            started = time.perf_counter()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self.pool, parse_title_page, content)
+            finally:
+                with self._lock:
+                    self.pending -= 1
+                metrics.PARSE_SECONDS.observe(time.perf_counter() - started, "process_pool")
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+            metrics.QUEUE_DEPTH.remove("parse_pending")
@@ -0,0 +1,65 @@
+"""CheckpointJournal recovery: torn tails, rotation and replay."""
+from models.movie_model import Actor, Movie
+from utils.checkpoint import CheckpointJournal
+
+
+def _movie(i):
+    return Movie(f"tt{i:07d}", f"Title {i}", 1990 + i, 8.0, 100 + i, (Actor(f"nm{i:07d}", f"Actor {i}"),), 70)
+
+
+def test_resume_replays_recorded_movies(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    journal = CheckpointJournal(path, fsync_every=1)
+    for i in range(3):
+        journal.record(_movie(i))
+    journal.close()
+
+    resumed = CheckpointJournal(path, resume=True)
+    try:
+        assert len(resumed) == 3 and "tt0000001" in resumed
+        assert list(resumed.replay()) == [_movie(i) for i in range(3)]
+    finally:
+        resumed.close()
+
+
+def test_torn_last_line_is_dropped_on_resume(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    journal = CheckpointJournal(path)
+    journal.record(_movie(0))
+    journal.close()
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write('{"movie_id": "tt0000001", "tit')  # crash mid-write
+
+    resumed = CheckpointJournal(path, resume=True)
+    resumed.record(_movie(2))
+    resumed.close()
+
+    assert path.read_text(encoding="utf-8").count("\n") == 2
+    again = CheckpointJournal(path, resume=True)
+    try:
+        assert [m.movie_id for m in again.replay()] == ["tt0000000", "tt0000002"]
+    finally:
+        again.close()
+
+
+def test_fresh_run_moves_an_unfinished_journal_aside(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    journal = CheckpointJournal(path)
+    journal.record(_movie(0))
+    journal.close()
+
+    fresh = CheckpointJournal(path)
+    try:
+        assert len(fresh) == 0
+        kept = [p for p in tmp_path.glob("checkpoint.*.jsonl")]
+        assert len(kept) == 1 and "tt0000000" in kept[0].read_text(encoding="utf-8")
+    finally:
+        fresh.close()
+
+
+def test_clear_removes_the_journal(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    journal = CheckpointJournal(path)
+    journal.record(_movie(0))
+    journal.clear()
+    assert not path.exists()
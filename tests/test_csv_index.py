@@ -0,0 +1,59 @@
+"""CsvIndex lookups and CSVHandler queries across exports; plain files only."""
+import pytest
+
+from models.movie_model import Actor, Movie
+from persistence.csv_handler import CSVHandler
+from persistence.csv_index import INDEX_SUFFIX, CsvIndex
+
+
+def _movie(movie_id, year, *actor_ids):
+    return Movie(movie_id, f"Title {movie_id}", year, 8.1, 120, tuple(Actor(a, f"Name {a}") for a in actor_ids), 75)
+
+
+@pytest.fixture
+def handler(tmp_path, monkeypatch):
+    monkeypatch.setenv("CSV_COMPRESSION", "none")
+    monkeypatch.setenv("CSV_FILENAME_PREFIX", "imdb_movies")
+    return CSVHandler(output_dir=str(tmp_path))
+
+
+def _export(handler, stamp, movies):
+    handler.stamp, handler.part = stamp, 1
+    handler.filename = handler._path()
+    handler.save_stream(iter(movies))
+    return handler.filename
+
+
+def test_index_offsets_and_read(handler):
+    path = _export(handler, "20240101_000000", [
+        _movie("tt01", 1994, "nm1", "nm2"),
+        _movie("tt02", 1972, "nm2"),
+        _movie("tt03", 1994),
+    ])
+    index = CsvIndex(path)
+    assert path.with_name(path.name + INDEX_SUFFIX).exists()
+    assert [m.movie_id for m in index.read(index.offsets("year", "1994"))] == ["tt01", "tt03"]
+    assert [m.movie_id for m in index.read(index.offsets("actor", "nm2"))] == ["tt01", "tt02"]
+    assert next(index.read(index.offsets("id", "tt02"))) == _movie("tt02", 1972, "nm2")
+    assert index.offsets("id", "tt99") == []
+
+
+def test_index_is_rebuilt_after_the_file_changes(handler):
+    path = _export(handler, "20240101_000000", [_movie("tt01", 1994)])
+    index = CsvIndex(path)
+    handler.save_stream(iter([_movie("tt02", 2001)]))  # appends to the same part
+    assert not index.is_current()
+    rebuilt = CsvIndex(path)
+    assert [m.movie_id for m in rebuilt.read(rebuilt.offsets("year", "2001"))] == ["tt02"]
+
+
+def test_query_returns_the_newest_row_of_each_movie(handler, tmp_path):
+    _export(handler, "20240101_000000", [_movie("tt01", 1994, "nm1"), _movie("tt02", 1994, "nm1")])
+    _export(handler, "20240201_000000", [_movie("tt02", 1995, "nm3")])  # re-exported with a new year and cast
+    (tmp_path / "imdb_movies_old_20240301_000000_0001.csv").write_text("ignored\n")  # another prefix
+
+    assert [m.movie_id for m in handler.get_movies_by_year(1994)] == ["tt01"]
+    assert [m.movie_id for m in handler.get_movies_by_year(1995)] == ["tt02"]
+    assert [m.movie_id for m in handler.get_movies_by_actor("nm1")] == ["tt01"]
+    assert handler.get_movie("tt02").year == 1995
+    assert handler.get_movie("tt99") is None
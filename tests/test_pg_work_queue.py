@@ -0,0 +1,74 @@
+"""
+Two live workers draining one PgWorkQueue run.
+
+Needs a reachable Postgres (POSTGRES_* env, same defaults as the app);
+skipped otherwise.
+"""
+import threading
+import uuid
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from models.movie_model import Movie  # noqa: E402
+from persistence.pg_work_queue import PgWorkQueue  # noqa: E402
+
+
+def _edges(count):
+    return [{"currentRank": i + 1, "node": {"id": f"tt{i:07d}"}} for i in range(count)]
+
+
+@pytest.fixture
+def run_id(monkeypatch):
+    monkeypatch.setenv("WORK_QUEUE_BATCH", "7")
+    monkeypatch.setenv("WORK_QUEUE_POLL", "0.1")
+    monkeypatch.setenv("WORK_QUEUE_MAX_ATTEMPTS", "2")
+    try:
+        PgWorkQueue(run_id="probe").close()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Postgres not reachable: {e}")
+    return f"test-{uuid.uuid4().hex[:8]}"
+
+
+def _work(queue, seen, fail, skip):
+    """Worker loop as main.py runs it: hand, skip or fail each title, then settle the batch."""
+    try:
+        for batch in queue.claimed_batches():
+            ids = [edge["node"]["id"] for edge in batch]
+            seen.extend(ids)
+            scraped = (Movie(movie_id, "title", 2000, 8.0, 120) for movie_id in ids if movie_id not in fail | skip)
+            for _ in queue.track(scraped):  # the sinks' side of the stream
+                pass
+            queue.settle(success=True, done=[movie_id for movie_id in ids if movie_id in skip])
+        queue.finish(success=True)
+    finally:
+        queue.close()
+
+
+def test_two_live_workers_drain_the_run(run_id):
+    coordinator = PgWorkQueue(run_id=run_id)
+    try:
+        coordinator.enqueue(_edges(50))
+        fail = {"tt0000003", "tt0000030"}
+        skip = {"tt0000011"}
+        seen = [[], []]
+        workers = [
+            threading.Thread(
+                target=_work, args=(PgWorkQueue(run_id=run_id, worker_id=f"w{i}"), seen[i], fail, skip), daemon=True
+            )
+            for i in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=30)
+
+        assert not any(worker.is_alive() for worker in workers), "workers deadlocked"
+        assert coordinator.progress() == {"done": 48, "failed": 2}
+        assert set(seen[0]) | set(seen[1]) == {edge["node"]["id"] for edge in _edges(50)}
+    finally:
+        with coordinator.connection() as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM scrape_queue WHERE run_id = %s", (run_id,))
+            conn.commit()
+        coordinator.close()
@@ -0,0 +1,68 @@
+"""RetryPolicy, classify and DelayQueue; no network needed."""
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.retry import DelayQueue, FetchError, RetryPolicy, classify
+
+
+def _http_error(status, headers=None):
+    error = Exception(f"HTTP {status}")
+    error.response = SimpleNamespace(status_code=status, headers=headers or {})
+    return error
+
+
+@pytest.mark.parametrize(
+    "status, expected", [(403, "403"), (429, "429"), (503, "5xx"), (404, "4xx"), (None, "other")]
+)
+def test_classify_by_status(status, expected):
+    assert classify(_http_error(status)) == expected
+
+
+def test_classify_timeout_and_fetch_error():
+    assert classify(TimeoutError()) == "timeout"
+    assert classify(FetchError("parse", ValueError("no __NEXT_DATA__"))) == "parse"
+
+
+def test_policy_overrides_only_the_given_classes():
+    policy = RetryPolicy("429=7:1:5; parse=1:0:0")
+    assert policy.rules["429"].attempts == 7
+    assert policy.rules["parse"].attempts == 1
+    assert policy.rules["timeout"].attempts == 3  # from DEFAULT_POLICY
+
+
+def test_delay_is_capped_and_stops_after_the_last_attempt():
+    policy = RetryPolicy("5xx=3:10:4")
+    for attempt in (1, 2):
+        assert 0 <= policy.delay("5xx", attempt) <= 4
+    assert policy.delay("5xx", 3) is None
+
+
+def test_unknown_class_falls_back_to_other():
+    policy = RetryPolicy("other=1:0:0")
+    assert policy.delay("teapot", 1) is None
+
+
+def test_retry_after_raises_the_delay():
+    policy = RetryPolicy("429=3:0:0")
+    error = FetchError("429", _http_error(429, {"Retry-After": "12"}))
+    assert policy.delay("429", 1, error) == 12
+
+
+def test_delay_queue_pops_in_due_order():
+    queue = DelayQueue()
+    queue.push("later", 60)
+    queue.push("second", 0)
+    queue.push("first", -1)
+    assert queue.pop_due() == ["first", "second"]
+    assert len(queue) == 1
+    assert 59 < queue.next_due_in() <= 60
+
+
+def test_delay_queue_empty():
+    queue = DelayQueue()
+    assert queue.next_due_in() is None
+    queue.push("x", 0.01)
+    time.sleep(0.02)
+    assert queue.pop_due() == ["x"]
@@ -0,0 +1,102 @@
+import asyncio
+import queue
+import threading
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+from . import metrics
+
+_DONE = object()
+
+Emit = Callable[[Any], Awaitable[None]]
+
+
+def stream_from_async(
+    producer: Callable[[Emit], Awaitable[None]],
+    maxsize: int = 0,
+    name: Optional[str] = None,
+) -> Iterator[Any]:
+    """
+    Run an async producer on a private event loop in a background thread
+    and expose whatever it emits as a plain (blocking) iterator.
+
+    The producer receives an ``emit`` coroutine function; every awaited
+    ``emit(item)`` becomes one item of the returned iterator. ``maxsize``
+    bounds the hand-off queue so a slow consumer applies backpressure to
+    the event loop instead of buffering the whole run in memory.
+    Exceptions raised by the producer are re-raised in the consumer.
+    With a ``name`` the hand-off queue depth is exported as a metric.
+    """
+    results: queue.Queue = queue.Queue(maxsize=maxsize)
+    if name:
+        metrics.QUEUE_DEPTH.set_function(results.qsize, name)
+    closed = threading.Event()
+    started = threading.Event()
+    loop = asyncio.new_event_loop()
+    state: dict = {}
+    # a full queue parks emit() on `space`; the consumer sets it after its next get
+    space = asyncio.Event()
+    producer_waiting = threading.Event()
+
+    async def emit(item: Any) -> None:
+        while True:
+            if closed.is_set():
+                raise asyncio.CancelledError()
+            try:
+                results.put_nowait(item)
+                return
+            except queue.Full:
+                space.clear()
+                producer_waiting.set()
+                if results.full():  # the consumer may have taken one before seeing the flag
+                    await space.wait()
+
+    async def runner() -> None:
+        try:
+            await producer(emit)
+        except asyncio.CancelledError:
+            pass
+        except BaseException as exc:  # surfaced to the consumer
+            state["error"] = exc
+        finally:
+            try:
+                await emit(_DONE)
+            except asyncio.CancelledError:
+                pass
+
+    def run_loop() -> None:
+        asyncio.set_event_loop(loop)
+        try:
+            state["task"] = loop.create_task(runner())
+            started.set()
+            loop.run_until_complete(state["task"])
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run_loop, name="async-fetch-loop", daemon=True)
+    thread.start()
+    started.wait()
+
+    try:
+        while True:
+            item = results.get()
+            if producer_waiting.is_set():
+                producer_waiting.clear()
+                try:
+                    loop.call_soon_threadsafe(space.set)
+                except RuntimeError:
+                    pass  # loop already finished
+            if item is _DONE:
+                break
+            yield item
+        if "error" in state:
+            raise state["error"]
+    finally:
+        closed.set()
+        try:
+            loop.call_soon_threadsafe(state["task"].cancel)
+        except RuntimeError:
+            pass  # loop already finished
+        thread.join(timeout=10)
+        if name:
+            metrics.QUEUE_DEPTH.remove(name)
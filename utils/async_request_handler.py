@@ -0,0 +1,174 @@
+# async_request_handler.py
+import asyncio
+import os
+import time
+from curl_cffi import requests
+from typing import Dict, Optional
+from utils.logging_config import setup_logger
+from .proxy_handler import ProxyHandler
+from .session_pool import AsyncSessionPool
+from .http_cache import HTTPCache, CacheMissError
+from .rate_limiter import AdaptiveRateLimiter
+from . import metrics
+
+
+class AsyncRequestHandler:
+    """
+    asyncio counterpart of RequestHandler built on curl_cffi's AsyncSession.
+
+    Each proxy gets one pooled AsyncSession that multiplexes every
+    in-flight request over a libcurl multi handle, so hundreds of requests
+    can be pending on one thread. Must be created and used inside a
+    running event loop.
+    """
+
+    def __init__(
+        self,
+        proxy_handler: Optional[ProxyHandler] = None,
+        max_clients: int = 10,
+        cache: Optional[HTTPCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
+        self.logger = setup_logger(__name__)
+        self.proxy_handler = proxy_handler
+        self.session_pool = AsyncSessionPool(max_clients=max_clients)
+        self.cache = cache or HTTPCache(mode="off")
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+
+    def _get_request_params(self, headers, use_proxy: bool = True) -> Dict:
+        params = {
+            "headers": {**headers},
+            "timeout": int(os.getenv("REQUEST_TIMEOUT", 30)),
+        }
+        if use_proxy and self.proxy_handler and self.proxy_handler.enabled:
+            proxies = self.proxy_handler.get_current_proxy()
+            if "socks" in proxies.get("http", ""):
+                proxies = {
+                    "http": proxies["http"].replace("socks5", "socks5h"),
+                    "https": proxies["https"].replace("socks5", "socks5h"),
+                }
+            params["proxies"] = proxies
+        return params
+
+    async def get(
+        self,
+        url: str,
+        headers: dict,
+        use_proxy: bool,
+        verify_proxy: bool = False,
+        max_retries: Optional[int] = None,
+    ) -> requests.Response:
+        cached = await self._cache_io(self.cache.lookup, url)
+        if cached and (self.cache.replay or self.cache.is_fresh(cached)):
+            self.logger.debug("CACHE HIT -> %s", url)
+            metrics.HTTP_CACHE.inc("hit")
+            return await self._cache_io(self.cache.response_for, cached)
+        if self.cache.replay:
+            raise CacheMissError(f"Not in cache (replay mode): {url}")
+        headers = {**headers, **self.cache.conditional_headers(cached)}
+
+        response = await self._request("GET", url, headers, use_proxy, max_retries)
+        if response.status_code == 304 and cached:
+            metrics.HTTP_CACHE.inc("revalidated")
+            return await self._cache_io(self.cache.revalidated, cached, response)
+        await self._cache_io(self.cache.store, url, response)
+        return response
+
+    async def _cache_io(self, fn, *args):
+        """Run a cache call off the event loop: it reads and writes SQLite and body files."""
+        if not self.cache.enabled:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def post(
+        self,
+        url: str,
+        payload: dict,
+        headers: dict,
+        use_proxy: bool,
+        max_retries: Optional[int] = None,
+    ) -> requests.Response:
+        """POST `payload` as JSON (GraphQL queries); never cached."""
+        return await self._request("POST", url, headers, use_proxy, max_retries, json=payload)
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        headers: dict,
+        use_proxy: bool,
+        max_retries: Optional[int] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send with retries, proxy rotation and rate limiting; a 304 is returned
+        as is. With max_retries=1 the caller owns retries, so a failure is
+        raised without being logged or counted here.
+        """
+        max_retries = max_retries or int(os.getenv("MAX_RETRIES", 3))
+        last_exception = None
+
+        for attempt in range(max_retries):
+            try:
+                proxied = use_proxy and self.proxy_handler and self.proxy_handler.enabled
+                if attempt > 0:
+                    metrics.HTTP_RETRIES.inc("async")
+                if attempt > 0 and proxied:
+                    # re-pins only this worker task; the others keep their proxies
+                    self.proxy_handler.rotate_proxy()
+
+                proxy_url = self.proxy_handler.get_current_proxy().get("http") if proxied else None
+
+                params = self._get_request_params(headers, use_proxy=use_proxy)
+                proxy_key = params.pop("proxies", {}).get("https")
+                started = await self.rate_limiter.acquire_async(url, proxy_key)
+                status = retry_after = None
+                transport_error = False
+                try:
+                    response = await self.session_pool.session(proxy_key).request(method, url, **params, **kwargs)
+                    status, retry_after = response.status_code, response.headers.get("Retry-After")
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                    transport_error = True
+                    raise
+                finally:
+                    self.rate_limiter.release(url, started, status, retry_after, transport_error)
+                    metrics.HTTP_REQUEST_SECONDS.observe(time.monotonic() - started, "async", status or "error")
+                    if proxy_url:
+                        self.proxy_handler.report(proxy_url, time.monotonic() - started, status)
+
+                self.logger.info(
+                    "%s %s [Proxy:%s] -> %s",
+                    method, response.status_code, proxy_url or 'direct', url,
+                    extra={"sample": True},
+                )
+                if response.status_code == 304:
+                    return response
+                response.raise_for_status()
+
+                if not response.text:
+                    self.logger.error("Empty response received")
+                    raise ValueError("Invalid response content")
+
+                metrics.HTTP_RESPONSE_BYTES.observe(len(response.content), "async")
+                return response
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                last_exception = e
+                if max_retries == 1:
+                    # a single attempt: the caller schedules the retry and reports the final failure
+                    raise
+                self.logger.warning("Attempt %s failed: %s", attempt + 1, e)
+
+                if attempt < max_retries - 1:
+                    delay = min(2 ** attempt, 10)
+                    self.logger.info("Waiting %ss before retry...", delay)
+                    await asyncio.sleep(delay)
+
+        metrics.HTTP_FAILURES.inc("async")
+        self.logger.error("Failed after %s attempts for %s", max_retries, url)
+        raise last_exception or requests.exceptions.RequestException("Request failed")
+
+    async def close(self) -> None:
+        await self.session_pool.close()
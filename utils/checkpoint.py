@@ -0,0 +1,124 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from models.movie_model import Movie
+from .logging_config import setup_logger
+
+
+class CheckpointJournal:
+    """
+    Append-only journal of the titles a run has finished, with their parsed
+    payload, so an interrupted run can be resumed without re-fetching them.
+
+    One JSON line per movie (Movie.to_dict() plus movie_id). Every line is
+    flushed to the OS as soon as it is written, so a crashed process loses
+    nothing; the file is fsync'd every CHECKPOINT_FSYNC_EVERY lines and on
+    close, which bounds what a power loss can take with it. A torn last line
+    is skipped on load.
+
+    A resumed run (`resume=True`) loads the journal and keeps appending, and
+    a run whose sinks all succeeded removes it. A fresh run never truncates
+    a journal left behind by an interrupted run: it is moved aside to
+    <name>.<timestamp>.jsonl, from where it can be renamed back and resumed.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        resume: bool = False,
+        fsync_every: Optional[int] = None,
+    ):
+        self.logger = setup_logger(__name__)
+        self.path = Path(path or os.getenv("CHECKPOINT_FILE", "data/checkpoint.jsonl"))
+        self.fsync_every = max(1, fsync_every or int(os.getenv("CHECKPOINT_FSYNC_EVERY", 25)))
+        self.completed: Dict[str, Dict] = self._load() if resume else {}
+        self._ids = set(self.completed)  # only ids are kept for titles journaled by this run
+        self._unsynced = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not resume:
+            self._rotate()
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+        if resume:
+            self.logger.info("Resuming: %s titles already in %s", len(self.completed), self.path)
+
+    def _rotate(self) -> None:
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return
+        kept = self.path.with_name(f"{self.path.stem}.{datetime.now():%Y%m%d_%H%M%S}{self.path.suffix}")
+        self.path.rename(kept)
+        self.logger.warning(
+            "%s holds an unfinished run that was not resumed; moved it to %s "
+            "(rename it back and run with --resume to continue it)", self.path, kept,
+        )
+
+    def _load(self) -> Dict[str, Dict]:
+        completed: Dict[str, Dict] = {}
+        if not self.path.exists():
+            return completed
+        self._drop_torn_tail()
+        with open(self.path, encoding="utf-8") as fh:
+            for line_no, line in enumerate(fh, 1):
+                try:
+                    record = json.loads(line)
+                    completed[record["movie_id"]] = record
+                except (ValueError, KeyError):
+                    self.logger.warning("Skipping unreadable checkpoint line %s in %s", line_no, self.path)
+        return completed
+
+    def _drop_torn_tail(self) -> None:
+        # a line cut short by a crash would otherwise be glued to the next append
+        with open(self.path, "rb+") as fh:
+            size = fh.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            fh.seek(size - 1)
+            if fh.read(1) == b"\n":
+                return
+            fh.seek(0)
+            fh.truncate(fh.read().rfind(b"\n") + 1)
+            self.logger.warning("Dropped a partial last line from %s", self.path)
+
+    def __contains__(self, movie_id: str) -> bool:
+        return movie_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def replay(self, registry=None) -> Iterator[Movie]:
+        """Movies recorded by the interrupted run, in the order they were written."""
+        for record in list(self.completed.values()):
+            yield Movie.from_dict(record, registry=registry)
+
+    def record(self, movie: Movie) -> None:
+        """Append one finished title."""
+        if movie.movie_id in self._ids:
+            return
+        entry = {"movie_id": movie.movie_id, **movie.to_dict()}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._ids.add(movie.movie_id)
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def clear(self) -> None:
+        """Drop the journal once the run it covers has been fully persisted."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+        self.logger.info("Run complete, removed checkpoint %s", self.path)
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .logging_config import setup_logger
+
+CACHE_MODES = ("off", "on", "replay")
+
+
+class CacheMissError(Exception):
+    """Raised in replay mode when a URL has never been cached."""
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    digest: str
+    status_code: int
+    headers: Dict[str, str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    expires_at: float
+    size: int
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for curl_cffi's Response, served from the cache.
+    Exposes the attributes the scrapers read (status_code, headers,
+    content, text, json()).
+    """
+
+    def __init__(self, url: str, status_code: int, headers: Dict[str, str], content: bytes):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.from_cache = True
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        pass  # only 2xx responses are ever stored
+
+
+class HTTPCache:
+    """
+    Content-addressed on-disk HTTP cache.
+
+    Bodies live under <dir>/objects/<sha256[:2]>/<sha256>, so identical
+    responses are stored once; a small SQLite index maps each URL to its
+    body, validators (ETag / Last-Modified) and expiry. Entries past their
+    TTL are revalidated with a conditional request, and the least recently
+    used entries are evicted once the store exceeds its size cap.
+
+    Modes (HTTP_CACHE_MODE):
+      - off     never read or write the cache (default: a plain run always
+                sees current ratings and chart positions)
+      - on      serve fresh entries, revalidate stale ones, store new ones
+      - replay  serve only from the cache and never touch the network
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        mode: Optional[str] = None,
+        default_ttl: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_rules: Optional[List[Tuple[str, int]]] = None,
+    ):
+        self.logger = setup_logger(__name__)
+        self.mode = (mode or os.getenv("HTTP_CACHE_MODE", "off")).lower()
+        if self.mode not in CACHE_MODES:
+            raise ValueError(f"Unknown HTTP_CACHE_MODE: {self.mode}. Valid options: {list(CACHE_MODES)}")
+
+        self.default_ttl = default_ttl if default_ttl is not None else int(os.getenv("HTTP_CACHE_TTL", 6 * 3600))
+        self.max_bytes = max_bytes or int(os.getenv("HTTP_CACHE_MAX_MB", 512)) * 1024 * 1024
+        self.ttl_rules = ttl_rules if ttl_rules is not None else self._parse_ttl_rules(
+            os.getenv("HTTP_CACHE_TTL_RULES", "caching.graphql.imdb.com=3600")
+        )
+
+        self._lock = threading.Lock()
+        self._db = None
+        if not self.enabled:
+            return
+
+        self.cache_dir = Path(cache_dir or os.getenv("HTTP_CACHE_DIR", "data/http_cache"))
+        self.objects_dir = self.cache_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.cache_dir / "index.sqlite", check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                url           TEXT PRIMARY KEY,
+                digest        TEXT    NOT NULL,
+                status_code   INTEGER NOT NULL,
+                headers       TEXT    NOT NULL,
+                etag          TEXT,
+                last_modified TEXT,
+                stored_at     REAL    NOT NULL,
+                expires_at    REAL    NOT NULL,
+                last_access   REAL    NOT NULL,
+                size          INTEGER NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access)")
+        self._db.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def _parse_ttl_rules(raw: str) -> List[Tuple[str, int]]:
+        """'pattern=seconds;pattern=seconds' -> [(pattern, seconds)], longest pattern first."""
+        rules = []
+        for item in filter(None, (part.strip() for part in raw.split(";"))):
+            pattern, _, seconds = item.rpartition("=")
+            rules.append((pattern, int(seconds)))
+        return sorted(rules, key=lambda rule: len(rule[0]), reverse=True)
+
+    def ttl_for(self, url: str) -> int:
+        for pattern, seconds in self.ttl_rules:
+            if pattern in url:
+                return seconds
+        return self.default_ttl
+
+    # ------------------------------------------------------------------
+    # lookups
+    # ------------------------------------------------------------------
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, digest, status_code, headers, etag, last_modified, stored_at, expires_at, size "
+                "FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+        entry = CacheEntry(*row)
+        entry.headers = json.loads(entry.headers)
+        if not self._object_path(entry.digest).exists():
+            return None
+        return entry
+
+    @staticmethod
+    def is_fresh(entry: CacheEntry) -> bool:
+        return entry.expires_at > time.time()
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Validators for revalidating a stale entry."""
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def response_for(self, entry: CacheEntry) -> CachedResponse:
+        content = self._object_path(entry.digest).read_bytes()
+        return CachedResponse(entry.url, entry.status_code, entry.headers, content)
+
+    # ------------------------------------------------------------------
+    # writes
+    # ------------------------------------------------------------------
+    def store(self, url: str, response) -> None:
+        """Store a 2xx response body and its validators."""
+        if not self.enabled or not 200 <= response.status_code < 300:
+            return
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_bytes(content)
+            os.replace(tmp, path)
+
+        headers = {k.lower(): v for k, v in dict(response.headers).items()}
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url, digest, response.status_code, json.dumps(headers),
+                    headers.get("etag"), headers.get("last-modified"),
+                    now, now + self.ttl_for(url), now, len(content),
+                ),
+            )
+            self._db.commit()
+            self._evict()
+
+    def revalidated(self, entry: CacheEntry, response) -> CachedResponse:
+        """A 304 confirmed the entry: extend its lifetime and serve it."""
+        now = time.time()
+        headers = {k.lower(): v for k, v in dict(response.headers).items()}
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET stored_at = ?, expires_at = ?, etag = COALESCE(?, etag) WHERE url = ?",
+                (now, now + self.ttl_for(entry.url), headers.get("etag"), entry.url),
+            )
+            self._db.commit()
+        return self.response_for(entry)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the store fits max_bytes. Caller holds the lock."""
+        total = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._db.execute("SELECT url, digest, size FROM entries ORDER BY last_access").fetchall()
+        for url, digest, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+            shared = self._db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+            if not shared:
+                self._object_path(digest).unlink(missing_ok=True)
+                total -= size
+        self._db.commit()
+        self.logger.debug("HTTP cache evicted down to %s bytes", total)
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+                self._db = None
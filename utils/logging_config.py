@@ -1,9 +1,16 @@
+import atexit
+import json
 import logging
+import numbers
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
 import sys
-from pathlib import Path
+import threading
+from collections.abc import Mapping
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
 
 _LEVEL_MAP = {
     "DEBUG": logging.DEBUG,
@@ -13,48 +20,221 @@ _LEVEL_MAP = {
     "CRITICAL": logging.CRITICAL,
 }
 
-def setup_logger(name: str = "imdb_scraper") -> logging.Logger:
+# top-level loggers of this project; third-party loggers never reach the queue
+_PROJECT_LOGGERS = ("__main__", "main", "benchmarks", "factories", "models", "persistence", "scrapers", "utils")
+_DEFAULT_NAME = "imdb_scraper"
+
+_configure_lock = threading.Lock()
+_listener = None
+_queue_handler = None
+_file_router = None
+_attached: set = set()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _SampleFilter(logging.Filter):
     """
-    Configure a logger whose level is controlled by the env variable LOG_LEVEL
-    (default = INFO).  Console uses the same level; file always logs DEBUG+.
+    Keeps only a fraction of the per-request records, i.e. those logged with
+    extra={"sample": True} below WARNING. Failures are never sampled away.
     """
-    log_level = _LEVEL_MAP.get(os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
 
-    log_dir = Path(__file__).parent.parent / "logs"
-    log_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
 
-    logger = logging.getLogger(name)
-    logger.setLevel(log_level)
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not getattr(record, "sample", False):
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+# immutable, so safe to format later on the listener thread
+_PRIMITIVES = (str, bytes, numbers.Number, type(None))
+
+
+class _Snapshot:
+    """str() and repr() of a mutable log argument, taken when the call was made."""
+
+    __slots__ = ("text", "rep")
+
+    def __init__(self, value):
+        self.text = str(value)
+        self.rep = repr(value)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return self.rep
+
+
+def _freeze(value):
+    return value if isinstance(value, _PRIMITIVES) else _Snapshot(value)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    Enqueues the record itself: the stock QueueHandler formats the message
+    on the calling thread, here msg and %-args are merged in the listener
+    thread, and only for records a handler actually keeps. Arguments that
+    are not primitives are stringified up front, since the caller may mutate
+    them once the call returns.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if isinstance(args, tuple):
+            if not all(isinstance(arg, _PRIMITIVES) for arg in args):
+                record.args = tuple(_freeze(arg) for arg in args)
+        elif isinstance(args, Mapping):
+            record.args = {key: _freeze(value) for key, value in args.items()}
+        return record
+
+
+class _FileRouter(logging.Handler):
+    """
+    Writes each record to the daily file of the logger it came from:
+    logs/<name>_YYYYMMDD.log for every name passed to setup_logger, the
+    nearest such ancestor for plain module loggers, imdb_scraper_YYYYMMDD.log
+    for the rest.
+    """
+
+    def __init__(self, log_dir: Path, formatter: logging.Formatter):
+        super().__init__(logging.DEBUG)
+        self.log_dir = log_dir
+        self.file_formatter = formatter
+        self.files: dict = {}
+        self.add(_DEFAULT_NAME)
+
+    def add(self, name: str) -> None:
+        if name in self.files:
+            return
+        # Rotating file (always DEBUG so nothing is lost)
+        file_handler = RotatingFileHandler(
+            filename=self.log_dir / f"{name}_{datetime.now():%Y%m%d}.log",
+            maxBytes=5 * 1024 * 1024,
+            backupCount=3,
+            encoding="utf-8",
+            delay=True,
+        )
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(self.file_formatter)
+        self.files = {**self.files, name: file_handler}  # swapped whole: read by the listener thread
 
-    # Prevent duplicate handlers
-    if logger.handlers:
-        return logger
+    def emit(self, record: logging.LogRecord) -> None:
+        files, name = self.files, record.name
+        while name and name not in files:
+            name = name.rpartition(".")[0]
+        files[name or _DEFAULT_NAME].handle(record)
 
-    formatter = logging.Formatter(
+    def close(self) -> None:
+        for file_handler in self.files.values():
+            file_handler.close()
+        super().close()
+
+
+def _formatter() -> logging.Formatter:
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        return JsonFormatter()
+    return logging.Formatter(
         "%(asctime)s | %(name)s | %(levelname)-8s | %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
 
+
+def _configure(log_level: int) -> None:
+    """
+    Build the pipeline once per process: the project's top-level loggers
+    share one QueueHandler, and a single QueueListener thread does the
+    formatting and the console / file I/O.
+    """
+    global _listener, _queue_handler, _file_router
+
+    log_dir = Path(__file__).parent.parent / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    formatter = _formatter()
+
     # Console (same level as env)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
     console_handler.setFormatter(formatter)
 
-    # Rotating file (always DEBUG so nothing is lost)
-    log_file = log_dir / f"{name}_{datetime.now():%Y%m%d}.log"
-    file_handler = RotatingFileHandler(
-        filename=log_file,
-        maxBytes=5 * 1024 * 1024,
-        backupCount=3,
-        encoding="utf-8",
-    )
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(formatter)
+    _file_router = _FileRouter(log_dir, formatter)
 
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _LazyQueueHandler(log_queue)
+    _queue_handler.addFilter(_SampleFilter(float(os.getenv("LOG_REQUEST_SAMPLE", 1.0))))
+    for name in _PROJECT_LOGGERS:
+        _attach(name, log_level)
+
+    _listener = QueueListener(log_queue, console_handler, _file_router, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown)
 
     # Silence noisy libraries
     logging.getLogger("urllib3").setLevel(logging.WARNING)
 
-    return logger
\ No newline at end of file
+
+def _attach(name: str, log_level: int) -> None:
+    """Route a top-level logger (and so all its children) to the queue; caller holds the lock."""
+    if name in _attached:
+        return
+    logger = logging.getLogger(name)
+    logger.setLevel(log_level)
+    logger.addHandler(_queue_handler)
+    logger.propagate = False
+    _attached.add(name)
+
+
+def setup_logger(name: str = _DEFAULT_NAME) -> logging.Logger:
+    """
+    Return a logger whose level is controlled by the env variable LOG_LEVEL
+    (default = INFO).  Console uses the same level; file always logs DEBUG+.
+
+    Records are handed to a queue and written by one background thread, so
+    callers never wait on stdout or the log file; each `name` keeps its own
+    daily file, as before. LOG_FORMAT=json switches to
+    JSON lines; LOG_REQUEST_SAMPLE (0-1, default 1) keeps that fraction of
+    the per-request GET lines.
+    """
+    log_level = _LEVEL_MAP.get(os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+
+    with _configure_lock:
+        if _listener is None:
+            _configure(log_level)
+        _attach(name.partition(".")[0], log_level)
+        _file_router.add(name)
+
+    logger = logging.getLogger(name)
+    logger.setLevel(log_level)
+    return logger
+
+
+def shutdown() -> None:
+    """Drain the queue and stop the writer thread (also run at exit)."""
+    global _listener, _queue_handler, _file_router
+    with _configure_lock:
+        if _listener is not None:
+            for name in _attached:
+                logger = logging.getLogger(name)
+                logger.removeHandler(_queue_handler)
+                logger.propagate = True
+            _attached.clear()
+            _listener.stop()
+            _file_router.close()
+            _listener = _queue_handler = _file_router = None
@@ -0,0 +1,373 @@
+"""
+In-process metrics and per-title trace spans.
+
+Counters, gauges and histograms are declared once at module level and
+updated from the hot paths (requests, parsing, flushes). With
+METRICS_ENABLED=false (default) every update returns immediately and
+nothing is exported; gauges that read a live value (queue sizes, healthy
+proxies) use callbacks, so they cost nothing until a scrape of /metrics.
+
+Exporters (METRICS_EXPORTER):
+    http  Prometheus text format on http://0.0.0.0:METRICS_PORT/metrics
+    file  the same text rewritten to METRICS_FILE every METRICS_FILE_INTERVAL s
+
+TRACE_ENABLED=true writes one JSON line per span to TRACE_FILE; spans
+opened inside `trace(imdb_id)` carry that title id, so fetch / parse time
+can be followed title by title.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import logging
+logger = logging.getLogger(__name__)
+
+_enabled = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+_tracing = os.getenv("TRACE_ENABLED", "false").lower() == "true"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1_024, 8_192, 65_536, 262_144, 1_048_576, 4_194_304)
+ROW_BUCKETS = (1, 10, 100, 500, 1_000, 5_000, 10_000)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _escape(value) -> str:
+    """Label value escaped for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _label_str(self, values: Tuple) -> str:
+        if not values:
+            return ""
+        pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values))
+        return "{" + pairs + "}"
+
+    def expose(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._label_str(k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+        self._functions: Dict[Tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, *labels) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[labels] = value
+
+    def set_function(self, fn: Callable[[], float], *labels) -> None:
+        """Read the value from `fn` at export time instead of on every change."""
+        if not _enabled:
+            return
+        with self._lock:
+            self._functions[labels] = fn
+
+    def remove(self, *labels) -> None:
+        with self._lock:
+            self._values.pop(labels, None)
+            self._functions.pop(labels, None)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for labels, fn in functions.items():
+            try:
+                values[labels] = fn()
+            except Exception:  # a dead callback must not break the export
+                continue
+        return [f"{self.name}{self._label_str(k)} {v}" for k, v in values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels) -> None:
+        if not _enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        if not _enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        for labels, counts in series.items():
+            base = self._label_str(labels)[1:-1]
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {counts[-1]}')
+            lines.append(f"{self.name}_sum{self._label_str(labels)} {counts[-2]}")
+            lines.append(f"{self.name}_count{self._label_str(labels)} {counts[-1]}")
+        return lines
+
+
+_REGISTRY: List[_Metric] = []
+
+
+def _register(metric):
+    _REGISTRY.append(metric)
+    return metric
+
+
+# ----------------------------------------------------------------------
+# metrics
+# ----------------------------------------------------------------------
+HTTP_REQUEST_SECONDS = _register(Histogram(
+    "imdb_http_request_seconds", "Latency of one HTTP attempt", ("engine", "status")))
+HTTP_RETRIES = _register(Counter(
+    "imdb_http_retries_total", "Retried HTTP attempts", ("engine",)))
+HTTP_FAILURES = _register(Counter(
+    "imdb_http_failures_total", "Requests that failed after every in-handler retry (titles: imdb_dead_letters_total)", ("engine",)))
+HTTP_RESPONSE_BYTES = _register(Histogram(
+    "imdb_http_response_bytes", "Size of successful response bodies", ("engine",), SIZE_BUCKETS))
+HTTP_CACHE = _register(Counter(
+    "imdb_http_cache_total", "HTTP cache outcomes", ("result",)))
+PARSE_SECONDS = _register(Histogram(
+    "imdb_parse_seconds", "__NEXT_DATA__ extraction and Movie mapping per title", ("stage",)))
+MOVIES_SCRAPED = _register(Counter(
+    "imdb_movies_scraped_total", "Movies handed to the sinks"))
+GRAPHQL_DETAILS = _register(Counter(
+    "imdb_graphql_details_total", "Titles requested through batched GraphQL", ("result",)))
+RETRIES_SCHEDULED = _register(Counter(
+    "imdb_retries_scheduled_total", "Failed titles put on the retry delay queue", ("error_class",)))
+DEAD_LETTERS = _register(Counter(
+    "imdb_dead_letters_total", "Titles that failed on every attempt", ("error_class",)))
+FLUSH_SECONDS = _register(Histogram(
+    "imdb_flush_seconds", "Duration of one persistence batch flush", ("backend", "method")))
+FLUSH_ROWS = _register(Histogram(
+    "imdb_flush_rows", "Movies per flushed batch", ("backend",), ROW_BUCKETS))
+QUEUE_DEPTH = _register(Gauge(
+    "imdb_queue_depth", "Items waiting in a pipeline queue", ("queue",)))
+PROXIES_ACTIVE = _register(Gauge(
+    "imdb_proxies_active", "Proxies whose circuit is closed"))
+PROXY_FAILURES = _register(Counter(
+    "imdb_proxy_failures_total", "Failed requests per proxy", ("proxy",)))
+RATE_LIMIT_CONCURRENCY = _register(Gauge(
+    "imdb_rate_limit_concurrency", "Current AIMD concurrency limit"))
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------------
+# tracing
+# ----------------------------------------------------------------------
+_trace_id: ContextVar[Optional[str]] = ContextVar("imdb_trace_id", default=None)
+_trace_lock = threading.Lock()
+_trace_file = None
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "started", "wall", "token")
+
+    def __init__(self, name: str, attrs: Dict, trace_id: Optional[str] = None):
+        self.name = name
+        self.attrs = attrs
+        self.token = _trace_id.set(trace_id) if trace_id is not None else None
+
+    def __enter__(self):
+        self.wall = time.time()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        record = {
+            "trace": _trace_id.get(),
+            "span": self.name,
+            "start": round(self.wall, 6),
+            "duration_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            **self.attrs,
+        }
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        if self.token is not None:
+            _trace_id.reset(self.token)
+        _write_span(record)
+        return False
+
+
+def _write_span(record: Dict) -> None:
+    global _trace_file
+    line = json.dumps(record, default=str) + "\n"
+    with _trace_lock:
+        if _trace_file is None:
+            path = Path(os.getenv("TRACE_FILE", "data/traces.jsonl"))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _trace_file = open(path, "a", encoding="utf-8")
+        _trace_file.write(line)
+
+
+def trace(trace_id: str, name: str = "title", **attrs):
+    """Root span for one title; spans opened inside it inherit the id."""
+    if not _tracing:
+        return _NOOP_SPAN
+    return _Span(name, attrs, trace_id)
+
+
+def span(name: str, **attrs):
+    """Child span of the current trace (a no-op when tracing is off)."""
+    if not _tracing:
+        return _NOOP_SPAN
+    return _Span(name, attrs)
+
+
+# ----------------------------------------------------------------------
+# exporters
+# ----------------------------------------------------------------------
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+_exporter: Dict = {}
+
+
+def _write_file(path: Path) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(render(), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def start_exporter() -> None:
+    """Start the configured exporter; does nothing when metrics are disabled."""
+    if not _enabled or _exporter:
+        return
+    kind = os.getenv("METRICS_EXPORTER", "http").lower()
+    if kind == "file":
+        path = Path(os.getenv("METRICS_FILE", "data/metrics.prom"))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        interval = float(os.getenv("METRICS_FILE_INTERVAL", 15))
+        stop = threading.Event()
+
+        def loop() -> None:
+            while not stop.wait(interval):
+                _write_file(path)
+
+        thread = threading.Thread(target=loop, name="metrics-file", daemon=True)
+        thread.start()
+        _exporter.update(kind=kind, path=path, stop=stop, thread=thread)
+        logger.info("Writing metrics to %s every %.0fs", path, interval)
+    else:
+        port = int(os.getenv("METRICS_PORT", 9108))
+        server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        _exporter.update(kind="http", server=server)
+        logger.info("Serving metrics on :%s/metrics", port)
+
+
+def shutdown() -> None:
+    """Stop the exporter (writing a final snapshot to file) and close the trace file."""
+    global _trace_file
+    if _exporter.get("kind") == "file":
+        _exporter["stop"].set()
+        _write_file(_exporter["path"])
+    elif _exporter.get("kind") == "http":
+        _exporter["server"].shutdown()
+        _exporter["server"].server_close()
+    _exporter.clear()
+    with _trace_lock:
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
@@ -0,0 +1,45 @@
+import json
+from typing import Dict, Optional
+
+try:  # optional, faster JSON backend
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+_MARKER = b'id="__NEXT_DATA__"'
+_TAG_END = b">"
+_SCRIPT_CLOSE = b"</script>"
+
+
+def loads(payload: bytes):
+    """Parse JSON bytes with orjson when installed, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def find_next_data(content: bytes) -> Optional[bytes]:
+    """
+    Return the raw bytes inside <script id="__NEXT_DATA__">...</script>
+    by scanning the page, or None if the tag is not found.
+    Next.js escapes '<' inside the payload, so the first </script> after
+    the opening tag always closes it.
+    """
+    marker = content.find(_MARKER)
+    if marker == -1:
+        return None
+    start = content.find(_TAG_END, marker)
+    if start == -1:
+        return None
+    end = content.find(_SCRIPT_CLOSE, start)
+    if end == -1:
+        return None
+    return content[start + 1:end]
+
+
+def extract_next_data(content: bytes) -> Optional[Dict]:
+    """Decode the __NEXT_DATA__ payload of a page without building a DOM."""
+    payload = find_next_data(content)
+    if payload is None:
+        return None
+    return loads(payload)
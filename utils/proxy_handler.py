@@ -1,10 +1,56 @@
 import os
-import itertools
+import random
+import threading
+import time
+import contextvars
 import requests
+from dataclasses import dataclass
 from typing import Dict, List, Optional
 from .logging_config import setup_logger
+from . import metrics
 from models.proxy_config import ProxyConfig
 
+BAN_STATUSES = (403, 407, 429)
+
+
+@dataclass
+class ProxyStats:
+    """Rolling health of one proxy; mutated under ProxyHandler's lock."""
+    address: str
+    latency: Optional[float] = None     # EWMA seconds
+    error_rate: float = 0.0             # EWMA of failures, 0..1
+    consecutive_failures: int = 0
+    bans: int = 0
+    open_until: float = 0.0             # circuit open (benched) until this monotonic time
+    cooldown: float = 0.0
+    ip: Optional[str] = None
+
+    def record(self, latency: Optional[float], failed: bool, banned: bool = False) -> None:
+        self.error_rate = 0.8 * self.error_rate + (0.2 if failed else 0.0)
+        self.consecutive_failures = self.consecutive_failures + 1 if failed else 0
+        if banned:
+            self.bans += 1
+        if latency is not None:
+            self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
+    def score(self) -> float:
+        latency = self.latency if self.latency is not None else 0.5
+        return max(0.01, (1 - self.error_rate) ** 2 / ((latency + 0.1) * (1 + 0.5 * self.bans)))
+
+    def is_open(self) -> bool:
+        return self.open_until > 0
+
+    def trip(self, base_cooldown: float) -> None:
+        # exponential cooldown while the proxy keeps failing its probes
+        self.cooldown = min(self.cooldown * 2 or base_cooldown, base_cooldown * 16)
+        self.open_until = time.monotonic() + self.cooldown
+
+    def reset(self) -> None:
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        self.consecutive_failures = 0
+        self.bans = 0
+
 
 class ProxyHandler:
     """
@@ -12,6 +58,13 @@ class ProxyHandler:
       - PROXY_TYPE=nordvpn    NordVPN only
       - PROXY_TYPE=custom     custom proxies only
       - PROXY_TYPE=both       NordVPN + custom proxies in rotation
+
+    Each proxy carries an EWMA latency, error rate and ban count. Workers
+    pick a proxy at random weighted by that score and keep it pinned
+    (per thread or asyncio task) until they rotate. PROXY_CIRCUIT_THRESHOLD
+    consecutive failures bench a proxy for PROXY_COOLDOWN seconds (doubling
+    while it keeps failing); a background thread re-probes benched proxies
+    and resolves exit IPs every PROXY_PROBE_INTERVAL seconds.
     """
 
     def __init__(self, enabled: bool = False):
@@ -19,8 +72,14 @@ class ProxyHandler:
 
         self.enabled = enabled
         self.proxies: List[ProxyConfig] = []
-        self._cycle = None
-        self.current_proxy: Optional[ProxyConfig] = None
+        self.stats: Dict[str, ProxyStats] = {}
+        self.circuit_threshold = int(os.getenv("PROXY_CIRCUIT_THRESHOLD", 3))
+        self.cooldown = float(os.getenv("PROXY_COOLDOWN", 60))
+        self.probe_interval = float(os.getenv("PROXY_PROBE_INTERVAL", 15))
+
+        self._lock = threading.Lock()
+        self._pinned: contextvars.ContextVar = contextvars.ContextVar("pinned_proxy", default=None)
+        self._stop = threading.Event()
 
         self._initialize_proxy()
 
@@ -38,7 +97,7 @@ class ProxyHandler:
         elif proxy_type == "custom":
             self.proxies = self._load_custom_proxies()
         else:
-            self.logger.warning(f"Unknown PROXY_TYPE '{proxy_type}', disabling proxy")
+            self.logger.warning("Unknown PROXY_TYPE '%s', disabling proxy", proxy_type)
             self.enabled = False
             return
 
@@ -47,9 +106,10 @@ class ProxyHandler:
             self.enabled = False
             return
 
-        self._cycle = itertools.cycle(self.proxies)
-        self.current_proxy = next(self._cycle)
-        self.logger.info(f"Proxy rotation enabled with {len(self.proxies)} proxies")
+        self.stats = {self.proxy_url(cfg): ProxyStats(cfg.address) for cfg in self.proxies}
+        metrics.PROXIES_ACTIVE.set_function(self.active_count)
+        threading.Thread(target=self._probe_loop, name="proxy-prober", daemon=True).start()
+        self.logger.info("Proxy rotation enabled with %s proxies", len(self.proxies))
 
     def _build_nordvpn_proxy(self) -> List[ProxyConfig]:
         """Return NordVPN proxy if TOKEN exists, else empty list."""
@@ -90,56 +150,162 @@ class ProxyHandler:
             idx += 1
         return configs
 
-    def get_current_proxy(self) -> Dict[str, str]:
-        """Return current proxy in requests-friendly dict."""
-        if not self.enabled or not self.current_proxy:
-            return {}
-
-        cfg = self.current_proxy
+    # ------------------------------------------------------------------
+    # selection
+    # ------------------------------------------------------------------
+    @staticmethod
+    def proxy_url(cfg: ProxyConfig) -> str:
         auth = (
             f"{cfg.username}:{cfg.password}@"
             if cfg.username and cfg.password
             else ""
         )
-        url = f"{cfg.protocol}://{auth}{cfg.address}:{cfg.port}"
+        return f"{cfg.protocol}://{auth}{cfg.address}:{cfg.port}"
+
+    def _pick(self, exclude: Optional[ProxyConfig] = None) -> ProxyConfig:
+        """Weighted random choice among proxies whose circuit is closed."""
+        with self._lock:
+            candidates = [
+                cfg for cfg in self.proxies
+                if not self.stats[self.proxy_url(cfg)].is_open() and cfg is not exclude
+            ]
+            if not candidates:
+                # everything is benched: use whichever comes back first
+                others = [cfg for cfg in self.proxies if cfg is not exclude] or self.proxies
+                return min(others, key=lambda cfg: self.stats[self.proxy_url(cfg)].open_until)
+            weights = [self.stats[self.proxy_url(cfg)].score() for cfg in candidates]
+        return random.choices(candidates, weights=weights)[0]
+
+    @property
+    def current_proxy(self) -> Optional[ProxyConfig]:
+        """Proxy pinned to the calling worker (thread or asyncio task), picked on first use."""
+        if not self.enabled or not self.proxies:
+            return None
+        cfg = self._pinned.get()
+        if cfg is None:
+            cfg = self._pick()
+            self._pinned.set(cfg)
+        return cfg
+
+    def get_current_proxy(self) -> Dict[str, str]:
+        """Return current proxy in requests-friendly dict."""
+        cfg = self.current_proxy
+        if cfg is None:
+            return {}
+        url = self.proxy_url(cfg)
         return {"http": url, "https": url}
 
-    def health_check(self) -> bool:
-        """Hit ipify to verify connectivity and log IP/location."""
-        if not self.enabled:
-            self.logger.warning("Health check skipped: proxy disabled")
-            return False
+    def rotate_proxy(self) -> None:
+        """
+        Re-pin the calling worker to another proxy, chosen by health score.
+        Other workers keep their proxies. RequestHandler keys its session
+        pool by proxy URL, so traffic moves to that proxy's pooled session
+        and the previous one stays warm for later reuse.
+        """
+        if not self.enabled or len(self.proxies) < 2:
+            return
 
+        cfg = self._pick(exclude=self._pinned.get())
+        self._pinned.set(cfg)
+        self.logger.debug(
+            "Rotated to proxy %s/%s: %s", self.proxies.index(cfg) + 1, len(self.proxies), cfg.address
+        )
+
+    # ------------------------------------------------------------------
+    # health tracking
+    # ------------------------------------------------------------------
+    def report(self, proxy_url: str, latency: float, status: Optional[int] = None) -> None:
+        """
+        Record the outcome of a request sent through `proxy_url`.
+        `status` is None when no response arrived (timeout, connection error).
+        """
+        stats = self.stats.get(proxy_url)
+        if stats is None:
+            return
+        with self._lock:
+            failed = status is None or status in BAN_STATUSES or status >= 500
+            if failed:
+                metrics.PROXY_FAILURES.inc(stats.address)
+            stats.record(latency if status is not None else None, failed, banned=status in BAN_STATUSES)
+            if failed and stats.consecutive_failures >= self.circuit_threshold and not stats.is_open():
+                stats.trip(self.cooldown)
+                self.logger.warning(
+                    "Proxy %s benched for %.0fs after %s consecutive failures",
+                    stats.address, stats.cooldown, stats.consecutive_failures,
+                )
+
+    def active_count(self) -> int:
+        """Number of proxies whose circuit is currently closed."""
+        return sum(not stats.is_open() for stats in self.stats.values())
+
+    def ip_for(self, proxy_url: Optional[str]) -> str:
+        """Exit IP of a proxy as last resolved by the background prober."""
+        stats = self.stats.get(proxy_url or "")
+        return (stats.ip if stats else None) or "pending"
+
+    def _probe(self, cfg: ProxyConfig) -> bool:
+        url = self.proxy_url(cfg)
+        started = time.monotonic()
         try:
             resp = requests.get(
                 "https://api.ipify.org?format=json",
-                proxies=self.get_current_proxy(),
+                proxies={"http": url, "https": url},
                 timeout=10,
             )
             resp.raise_for_status()
             ip = resp.json()["ip"]
-            self.logger.info(f"Proxy health OK. Current IP: {ip}")
+        except Exception as exc:
+            self.logger.debug("Probe through %s failed: %s", cfg.address, exc)
+            with self._lock:
+                self.stats[url].record(None, True)
+            return False
+
+        with self._lock:
+            stats = self.stats[url]
+            stats.ip = ip
+            stats.record(time.monotonic() - started, False)
+            if stats.is_open():
+                stats.reset()
+                self.logger.info("Proxy %s healthy again (IP %s)", cfg.address, ip)
+        return True
+
+    def _probe_loop(self) -> None:
+        """Resolve exit IPs and re-probe benched proxies, away from the request path."""
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for cfg in self.proxies:
+                stats = self.stats[self.proxy_url(cfg)]
+                half_open = stats.is_open() and stats.open_until <= now
+                if stats.ip is None or half_open:
+                    if not self._probe(cfg) and half_open:
+                        with self._lock:
+                            stats.trip(self.cooldown)
+            self._stop.wait(self.probe_interval)
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def health_check(self) -> bool:
+        """Hit ipify to verify connectivity and log IP/location."""
+        if not self.enabled:
+            self.logger.warning("Health check skipped: proxy disabled")
+            return False
+
+        cfg = self.current_proxy
+        if not self._probe(cfg):
+            self.logger.error("Proxy health check failed for %s", cfg.address)
+            return False
 
+        ip = self.ip_for(self.proxy_url(cfg))
+        self.logger.info("Proxy health OK. Current IP: %s", ip)
+        try:
             if os.getenv("VERIFY_LOCATION", "false").lower() == "true":
                 geo = requests.get(
                     f"http://ip-api.com/json/{ip}", timeout=5
                 ).json()
                 self.logger.info(
-                    f"Location: {geo.get('country', '?')}, {geo.get('city', '?')}"
+                    "Location: %s, %s", geo.get('country', '?'), geo.get('city', '?')
                 )
-            return True
-
         except Exception as exc:
-            self.logger.error(f"Proxy health check failed: {exc}")
-            return False
-
-    def rotate_proxy(self) -> None:
-        """Switch to the next proxy in the rotation list."""
-        if not self.enabled or not self._cycle:
-            return
-
-        self.current_proxy = next(self._cycle)
-        self.logger.info(
-            f"Rotated to proxy {self.proxies.index(self.current_proxy) + 1}/"
-            f"{len(self.proxies)}: {self.current_proxy.address}"
-        )
\ No newline at end of file
+            self.logger.warning("Location lookup failed: %s", exc)
+        return True
@@ -0,0 +1,223 @@
+import asyncio
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import metrics
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Classic token bucket; reserve() hands out a token and says how long to wait for it."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class AdaptiveRateLimiter:
+    """
+    Shared pacing and concurrency control for every in-flight request.
+
+      - token buckets per host (RATE_LIMIT_HOST_RPS) and per proxy
+        (RATE_LIMIT_PROXY_RPS), each allowing RATE_LIMIT_BURST requests
+        back to back; 0 disables a bucket
+      - AIMD concurrency limit between 1 and RATE_LIMIT_MAX_CONCURRENCY,
+        starting at the ceiling: +1/limit per successful response, halved
+        on 429/503, timeouts and connection errors or a latency spike
+        (RATE_LIMIT_LATENCY_FACTOR x the EWMA), at most once per round trip
+      - Retry-After pauses the host until the server says it is ready once
+        throttling persists at a limit of 1; before that the backoff above
+        handles it, and the throttled title itself always waits at least
+        Retry-After (see utils.retry.RetryPolicy)
+
+    acquire()/acquire_async() block until a slot and a token are available
+    and return the start time that must be handed back to release().
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        host_rps: Optional[float] = None,
+        proxy_rps: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        latency_factor: Optional[float] = None,
+    ):
+        self.enabled = (
+            enabled if enabled is not None
+            else os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        )
+        self.host_rps = host_rps if host_rps is not None else float(os.getenv("RATE_LIMIT_HOST_RPS", 0))
+        self.proxy_rps = proxy_rps if proxy_rps is not None else float(os.getenv("RATE_LIMIT_PROXY_RPS", 0))
+        self.burst = burst if burst is not None else float(os.getenv("RATE_LIMIT_BURST", 10))
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("RATE_LIMIT_MAX_CONCURRENCY", os.getenv("MAX_CONCURRENT_REQUESTS", "5"))
+        )
+        self.latency_factor = latency_factor or float(os.getenv("RATE_LIMIT_LATENCY_FACTOR", 3))
+
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self._proxy_buckets: Dict[str, TokenBucket] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._latency_ewma: Optional[float] = None
+        self._last_decrease = 0.0
+        self.stats = {"requests": 0, "throttled": 0, "backoffs": 0, "retry_after_waits": 0, "paced_seconds": 0.0}
+        if self.enabled:
+            metrics.RATE_LIMIT_CONCURRENCY.set_function(lambda: self.limit)
+
+    # ------------------------------------------------------------------
+    # acquire / release
+    # ------------------------------------------------------------------
+    def _reserve(self, host: str, proxy: Optional[str], now: float) -> float:
+        """Take a token from every applicable bucket; caller holds the lock."""
+        bucket = self._host_buckets.setdefault(host, TokenBucket(self.host_rps, self.burst))
+        delay = bucket.reserve(now)
+        if proxy:
+            bucket = self._proxy_buckets.setdefault(proxy, TokenBucket(self.proxy_rps, self.burst))
+            delay = max(delay, bucket.reserve(now))
+        blocked = self._blocked_until.get(host, 0.0) - now
+        if blocked > 0:
+            self.stats["retry_after_waits"] += 1
+            delay = max(delay, blocked)
+        self.stats["requests"] += 1
+        self.stats["paced_seconds"] += delay
+        return delay
+
+    def _take_slot(self, host: str, proxy: Optional[str]) -> Optional[float]:
+        """Claim a concurrency slot if one is free; caller holds the lock."""
+        if self.in_flight >= int(self.limit):
+            return None
+        self.in_flight += 1
+        return self._reserve(host, proxy, time.monotonic())
+
+    def acquire(self, url: str, proxy: Optional[str] = None) -> float:
+        if not self.enabled:
+            return time.monotonic()
+        host = urlsplit(url).netloc
+        with self._cond:
+            while (delay := self._take_slot(host, proxy)) is None:
+                self._cond.wait()
+        if delay > 0:
+            time.sleep(delay)
+        return time.monotonic()
+
+    async def acquire_async(self, url: str, proxy: Optional[str] = None) -> float:
+        if not self.enabled:
+            return time.monotonic()
+        host = urlsplit(url).netloc
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                delay = self._take_slot(host, proxy)
+                if delay is not None:
+                    break
+                freed = asyncio.Event()
+                self._async_waiters.append((loop, freed))
+            await freed.wait()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return time.monotonic()
+
+    def release(
+        self,
+        url: str,
+        started: float,
+        status: Optional[int] = None,
+        retry_after: Optional[str] = None,
+        transport_error: bool = False,
+    ) -> None:
+        """
+        Report the outcome of a request. `status` is None when no response
+        arrived; only a timeout or connection error (`transport_error`)
+        counts as congestion, a cancelled or locally failed request just
+        frees its slot.
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        latency = now - started
+        with self._cond:
+            self.in_flight -= 1
+
+            spike = (
+                status is not None and self._latency_ewma is not None
+                and latency > self._latency_ewma * self.latency_factor
+            )
+            if transport_error or status in THROTTLE_STATUSES or spike:
+                if status in THROTTLE_STATUSES:
+                    self.stats["throttled"] += 1
+                self._decrease(now)
+            elif status is not None:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+
+            wait = parse_retry_after(retry_after)
+            if wait and self.limit <= 1:
+                # still throttled with one request in flight: pause the host as asked
+                host = urlsplit(url).netloc
+                self._blocked_until[host] = max(self._blocked_until.get(host, 0.0), now + wait)
+
+            if status is not None and status < 400:
+                self._latency_ewma = (
+                    latency if self._latency_ewma is None
+                    else 0.8 * self._latency_ewma + 0.2 * latency
+                )
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, freed in waiters:
+            try:
+                loop.call_soon_threadsafe(freed.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    def _decrease(self, now: float) -> None:
+        # one multiplicative decrease per round trip, however many requests report trouble
+        if now - self._last_decrease < (self._latency_ewma or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(1.0, self.limit / 2)
+        self.stats["backoffs"] += 1
+
+    def snapshot(self) -> Dict:
+        """Current limits and counters, for logs and metrics."""
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "concurrency_limit": round(self.limit, 2),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "host_rps": self.host_rps,
+                "proxy_rps": self.proxy_rps,
+                "latency_ewma_ms": round((self._latency_ewma or 0) * 1000, 1),
+                **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()},
+            }
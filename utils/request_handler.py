@@ -1,46 +1,51 @@
 # request_handler.py
 import time
 import os
+import threading
 from curl_cffi import requests
 from typing import Dict, Optional
 from utils.logging_config import setup_logger
 from .proxy_handler import ProxyHandler
+from .session_pool import SessionPool
+from .http_cache import HTTPCache, CacheMissError
+from .rate_limiter import AdaptiveRateLimiter
+from . import metrics
 
 
 class RequestHandler:
-    def __init__(self, proxy_handler: Optional[ProxyHandler] = None):
+    def __init__(
+        self,
+        proxy_handler: Optional[ProxyHandler] = None,
+        session_pool: Optional[SessionPool] = None,
+        cache: Optional[HTTPCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
         self.logger = setup_logger(__name__)
         self.proxy_handler = proxy_handler
-        self._current_ip: Optional[str] = None  # cached IP
-
-    def _resolve_ip(self, use_proxy: bool) -> str:
-        """Query ipify once per proxy change."""
-        if use_proxy and self.proxy_handler and self.proxy_handler.enabled:
-            try:
-                resp = requests.get(
-                    "https://api.ipify.org?format=json",
-                    proxies=self.proxy_handler.get_current_proxy(),
-                    timeout=5,
-                    impersonate="chrome110",
-                )
-                return resp.json().get("ip", "unknown")
-            except Exception:
-                return "unknown"
-        else:
-            try:
-                resp = requests.get(
-                    "https://api.ipify.org?format=json",
-                    timeout=5,
-                )
-                return resp.json().get("ip", "unknown")
-            except Exception:
-                return "unknown"
-
-    def _get_or_update_ip(self, use_proxy: bool) -> str:
-        """Return cached IP or fetch new one."""
-        if self._current_ip is None:
-            self._current_ip = self._resolve_ip(use_proxy)
-        return self._current_ip
+        self.session_pool = session_pool or SessionPool()
+        self.cache = cache or HTTPCache()
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self._direct_ip: Optional[str] = None
+        self._direct_ip_lookup: Optional[threading.Thread] = None
+
+    def _resolve_direct_ip(self) -> None:
+        """Query ipify once for the direct egress IP (runs on a background thread)."""
+        try:
+            resp = requests.get("https://api.ipify.org?format=json", timeout=5)
+            self._direct_ip = resp.json().get("ip", "unknown")
+        except Exception:
+            self._direct_ip = "unknown"
+
+    def _egress_ip(self, proxy_url: Optional[str]) -> str:
+        """Best known egress IP for logging; never blocks the request path."""
+        if proxy_url:
+            return self.proxy_handler.ip_for(proxy_url)
+        if self._direct_ip_lookup is None:
+            self._direct_ip_lookup = threading.Thread(
+                target=self._resolve_direct_ip, name="direct-ip-lookup", daemon=True
+            )
+            self._direct_ip_lookup.start()
+        return self._direct_ip or "pending"
 
     def _get_request_params(self, headers, use_proxy: bool = True) -> Dict:
         params = {
@@ -65,50 +70,118 @@ class RequestHandler:
         verify_proxy: bool,
         max_retries: Optional[int] = None,
     ) -> requests.Response:
+        # proxies are verified by ProxyHandler's background prober, so
+        # verify_proxy no longer triggers a blocking check on the request path
+        cached = self.cache.lookup(url)
+        if cached and (self.cache.replay or self.cache.is_fresh(cached)):
+            self.logger.debug("CACHE HIT -> %s", url)
+            metrics.HTTP_CACHE.inc("hit")
+            return self.cache.response_for(cached)
+        if self.cache.replay:
+            raise CacheMissError(f"Not in cache (replay mode): {url}")
+        headers = {**headers, **self.cache.conditional_headers(cached)}
+
+        response = self._request("GET", url, headers, use_proxy, max_retries)
+        if response.status_code == 304 and cached:
+            metrics.HTTP_CACHE.inc("revalidated")
+            return self.cache.revalidated(cached, response)
+        self.cache.store(url, response)
+        return response
+
+    def post(
+        self,
+        url: str,
+        payload: dict,
+        headers: dict,
+        use_proxy: bool,
+        max_retries: Optional[int] = None,
+    ) -> requests.Response:
+        """POST `payload` as JSON (GraphQL queries); never cached."""
+        return self._request("POST", url, headers, use_proxy, max_retries, json=payload)
+
+    def _request(
+        self,
+        method: str,
+        url: str,
+        headers: dict,
+        use_proxy: bool,
+        max_retries: Optional[int] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send with retries, proxy rotation and rate limiting; a 304 is returned
+        as is. With max_retries=1 the caller owns retries, so a failure is
+        raised without being logged or counted here.
+        """
         max_retries = max_retries or int(os.getenv("MAX_RETRIES", 3))
         last_exception = None
 
         for attempt in range(max_retries):
             try:
-                if attempt > 0 and self.proxy_handler and self.proxy_handler.enabled:
+                proxied = use_proxy and self.proxy_handler and self.proxy_handler.enabled
+                if attempt > 0:
+                    metrics.HTTP_RETRIES.inc("sync")
+                if attempt > 0 and proxied:
                     self.proxy_handler.rotate_proxy()
-                    self._current_ip = None
-
-                ip = self._get_or_update_ip(use_proxy)
-                proxy_url = (
-                    self.proxy_handler.get_current_proxy().get("http", "direct")
-                    if use_proxy and self.proxy_handler and self.proxy_handler.enabled
-                    else "direct"
-                )
 
-                if attempt == 0 and use_proxy and self.proxy_handler and verify_proxy:
-                    if not self.proxy_handler.health_check():
-                        self.logger.warning("Proxy health check failed, continuing anyway...")
+                proxy_url = self.proxy_handler.get_current_proxy().get("http") if proxied else None
+                ip = self._egress_ip(proxy_url)
 
                 params = self._get_request_params(headers, use_proxy=use_proxy)
-                response = requests.get(url, **params)
+                # the pooled session carries the proxy, keep-alive connections and DNS cache
+                proxy_key = params.pop("proxies", {}).get("https")
+                started = self.rate_limiter.acquire(url, proxy_key)
+                status = retry_after = None
+                transport_error = False
+                try:
+                    with self.session_pool.session(proxy_key) as session:
+                        response = session.request(method, url, **params, **kwargs)
+                    status, retry_after = response.status_code, response.headers.get("Retry-After")
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                    transport_error = True
+                    raise
+                finally:
+                    self.rate_limiter.release(url, started, status, retry_after, transport_error)
+                    metrics.HTTP_REQUEST_SECONDS.observe(time.monotonic() - started, "sync", status or "error")
+                    if proxy_url:
+                        self.proxy_handler.report(proxy_url, time.monotonic() - started, status)
+
                 self.logger.info(
-                    f"GET {response.status_code} [IP:{ip}] [Proxy:{proxy_url}] -> {url}"
+                    "%s %s [IP:%s] [Proxy:%s] -> %s",
+                    method, response.status_code, ip, proxy_url or 'direct', url,
+                    extra={"sample": True},
                 )
+                if response.status_code == 304:
+                    return response
                 response.raise_for_status()
 
                 if not self._validate_response(response):
                     raise ValueError("Invalid response content")
 
+                metrics.HTTP_RESPONSE_BYTES.observe(len(response.content), "sync")
                 return response
 
             except Exception as e:
                 last_exception = e
-                self.logger.warning(f"Attempt {attempt + 1} failed: {e}")
+                if max_retries == 1:
+                    # a single attempt: the caller schedules the retry and reports the final failure
+                    raise
+                self.logger.warning("Attempt %s failed: %s", attempt + 1, e)
 
                 if attempt < max_retries - 1:
                     delay = min(2 ** attempt, 10)
-                    self.logger.info(f"Waiting {delay}s before retry...")
+                    self.logger.info("Waiting %ss before retry...", delay)
                     time.sleep(delay)
 
-        self.logger.error(f"Failed after {max_retries} attempts for {url}")
+        metrics.HTTP_FAILURES.inc("sync")
+        self.logger.error("Failed after %s attempts for %s", max_retries, url)
         raise last_exception or requests.exceptions.RequestException("Request failed")
 
+    def close(self) -> None:
+        """Close every pooled session and the cache index."""
+        self.session_pool.close()
+        self.cache.close()
+
     def _validate_response(self, response: requests.Response) -> bool:
         if not response.text:
             self.logger.error("Empty response received")
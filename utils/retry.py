@@ -0,0 +1,151 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from curl_cffi.requests import exceptions
+
+from .logging_config import setup_logger
+from .rate_limiter import parse_retry_after
+
+# class=attempts:base_delay:max_delay (seconds); RETRY_POLICY entries override these
+DEFAULT_POLICY = "timeout=3:2:30;403=3:5:60;429=5:2:60;5xx=4:1:30;4xx=1:0:0;parse=2:1:10;other=3:1:30"
+
+
+class FetchError(Exception):
+    """A failed title fetch or parse, tagged with its error class."""
+
+    def __init__(self, error_class: str, cause: BaseException):
+        super().__init__(f"{error_class}: {cause}")
+        self.error_class = error_class
+        self.cause = cause
+
+
+def classify(exc: BaseException) -> str:
+    """Error class of a request exception: timeout, 403, 429, 5xx, 4xx or other."""
+    if isinstance(exc, FetchError):
+        return exc.error_class
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status == 403 or status == 429:
+        return str(status)
+    if status and status >= 500:
+        return "5xx"
+    if status and status >= 400:
+        return "4xx"
+    if isinstance(exc, (exceptions.Timeout, TimeoutError)):
+        return "timeout"
+    return "other"
+
+
+@dataclass(frozen=True)
+class RetryRule:
+    attempts: int
+    base_delay: float
+    max_delay: float
+
+
+class RetryPolicy:
+    """
+    How often and how soon a failed title is tried again, per error class.
+
+    RETRY_POLICY takes `class=attempts:base:max;...` entries (see
+    DEFAULT_POLICY). The wait before attempt n+1 is drawn uniformly from
+    [0, min(max, base * 2^(n-1))] ("full jitter"), so titles that failed
+    together do not come back together; a Retry-After header on the
+    response raises it to at least what the server asked for.
+    """
+
+    def __init__(self, raw: Optional[str] = None):
+        self.rules: Dict[str, RetryRule] = self._parse(DEFAULT_POLICY)
+        self.rules.update(self._parse(raw if raw is not None else os.getenv("RETRY_POLICY", "")))
+
+    @staticmethod
+    def _parse(raw: str) -> Dict[str, RetryRule]:
+        rules = {}
+        for item in filter(None, (part.strip() for part in raw.split(";"))):
+            error_class, _, spec = item.partition("=")
+            attempts, base_delay, max_delay = spec.split(":")
+            rules[error_class.strip()] = RetryRule(int(attempts), float(base_delay), float(max_delay))
+        return rules
+
+    def delay(self, error_class: str, attempt: int, exc: Optional[BaseException] = None) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None when `attempt` was the last one."""
+        rule = self.rules.get(error_class, self.rules["other"])
+        if attempt >= rule.attempts:
+            return None
+        delay = random.uniform(0, min(rule.max_delay, rule.base_delay * 2 ** (attempt - 1)))
+        cause = exc.cause if isinstance(exc, FetchError) else exc
+        response = getattr(cause, "response", None)
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        return max(delay, retry_after or 0.0)
+
+
+class DelayQueue:
+    """Items ordered by the time they are due; for a single consumer thread."""
+
+    def __init__(self) -> None:
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, item: Any, delay: float) -> None:
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), item))
+
+    def pop_due(self) -> List[Any]:
+        now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def next_due_in(self) -> Optional[float]:
+        """Seconds until the earliest item is due (0 if overdue), None when empty."""
+        return max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else None
+
+
+@dataclass(frozen=True)
+class DeadLetter:
+    movie_id: str
+    error_class: str
+    attempts: int
+    error: str
+
+
+class DeadLetters:
+    """Titles that failed for good during a run; reported when the run ends."""
+
+    def __init__(self) -> None:
+        self.logger = setup_logger(__name__)
+        self._letters: List[DeadLetter] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._letters)
+
+    def __iter__(self) -> Iterator[DeadLetter]:
+        return iter(list(self._letters))
+
+    def add(self, movie_id: str, error_class: str, attempts: int, exc: BaseException) -> None:
+        cause = exc.cause if isinstance(exc, FetchError) else exc
+        with self._lock:
+            self._letters.append(DeadLetter(movie_id, error_class, attempts, str(cause)))
+
+    def report(self) -> None:
+        if not self._letters:
+            return
+        by_class = Counter(letter.error_class for letter in self._letters)
+        self.logger.error(
+            "%s titles failed for good: %s",
+            len(self._letters), ", ".join(f"{cls}={count}" for cls, count in by_class.most_common()),
+        )
+        for letter in self._letters:
+            self.logger.error(
+                "  %s after %s attempts [%s]: %s", letter.movie_id, letter.attempts, letter.error_class, letter.error
+            )
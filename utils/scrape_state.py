@@ -0,0 +1,87 @@
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+from .logging_config import setup_logger
+
+
+def chart_fields(edge: Dict) -> Dict:
+    """Chart-level fields of one `chartTitles` edge that signal a changed title."""
+    node = edge.get("node") or {}
+    return {
+        "rank": edge.get("currentRank"),
+        "rating": (node.get("ratingsSummary") or {}).get("aggregateRating"),
+    }
+
+
+class ScrapeState:
+    """
+    Last known chart state per title, used by the incremental scrape mode.
+
+    Maps movie_id -> {"rank", "rating", "fetched_at"}. A title needs its
+    detail page fetched when it is new, when one of its chart fields moved,
+    or when its last fetch is older than the staleness window. Each title's
+    window is stretched by a stable per-id jitter (up to STALE_JITTER of
+    the window) so stale titles are refreshed a few at a time instead of
+    all on the same day.
+
+    State comes from a JSON file (STATE_SOURCE=file) that is rewritten
+    after each run, or from the persisted `movies` table
+    (STATE_SOURCE=postgres), in which case it is read-only.
+    """
+
+    def __init__(
+        self,
+        entries: Dict[str, Dict],
+        path: Optional[Path] = None,
+        stale_after: Optional[float] = None,
+        jitter: Optional[float] = None,
+    ):
+        self.logger = setup_logger(__name__)
+        self.entries = entries
+        self.path = path
+        self.stale_after = (
+            stale_after if stale_after is not None
+            else float(os.getenv("STALE_AFTER_HOURS", 7 * 24)) * 3600
+        )
+        self.jitter = jitter if jitter is not None else float(os.getenv("STALE_JITTER", 0.25))
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "ScrapeState":
+        path = Path(path or os.getenv("STATE_FILE", "data/scrape_state.json"))
+        entries = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        return cls(entries, path=path)
+
+    def _window(self, movie_id: str) -> float:
+        spread = (zlib.crc32(movie_id.encode()) % 1000) / 1000
+        return self.stale_after * (1 + self.jitter * spread)
+
+    def needs_fetch(self, edge: Dict) -> bool:
+        movie_id = edge["node"]["id"]
+        known = self.entries.get(movie_id)
+        if known is None:
+            return True
+
+        current = chart_fields(edge)
+        for field, value in current.items():
+            if value is not None and known.get(field) is not None and value != known[field]:
+                return True
+
+        fetched_at = known.get("fetched_at") or 0
+        return time.time() - fetched_at > self._window(movie_id)
+
+    def mark_fetched(self, edge: Dict) -> None:
+        self.entries[edge["node"]["id"]] = {**chart_fields(edge), "fetched_at": time.time()}
+
+    def save(self) -> None:
+        """Persist the file-backed state atomically; no-op for read-only sources."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self.logger.info("Saved scrape state for %s titles to %s", len(self.entries), self.path)